@@ -0,0 +1,106 @@
+"""
+Server-side workout analytics over the columnar set-log store.
+
+Every summary is a single pass over the per-day aggregates the store keeps
+for each exercise (or its daily tonnage), so years of history reduce to a
+small table without reading every set or the client ever seeing the raw logs.
+"""
+
+from datetime import date, timedelta
+
+PERIODS = ("day", "week", "month")
+
+
+def period_key(date_str, period):
+    """Bucket key for a YYYY-MM-DD date: the date itself, its ISO week's Monday, or YYYY-MM."""
+    if period == "day":
+        return date_str
+    if period == "month":
+        return date_str[:7]
+    day = date.fromisoformat(date_str)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+class _DayKeys(dict):
+    """Memoized day ordinal -> period key conversion."""
+
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+
+    def __missing__(self, day):
+        key = self[day] = period_key(date.fromordinal(day).isoformat(), self.period)
+        return key
+
+
+def match_exercises(query, exercise_ids, exercise_db):
+    """Exercise ids (among those logged) matching an id or a case-insensitive name fragment."""
+    if query in exercise_ids:
+        return [query]
+    needle = query.strip().lower()
+    return [
+        exercise_id for exercise_id in exercise_ids
+        if needle in exercise_db.get(exercise_id, {}).get('name', '').lower()
+    ]
+
+
+def exercise_progress(store, exercise_ids, start=None, end=None, period="week"):
+    """Per-period volume, set count, top set and best estimated 1RM for some exercises."""
+    buckets = {}
+    keys = _DayKeys(period)
+    for day, _, sets, volume, top, e1rm in store.summaries(start, end, exercise_ids):
+        key = keys[day]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {'period': key, 'sets': 0, 'volume': 0.0, 'top_weight': 0.0, 'best_e1rm': 0.0}
+        bucket['sets'] += sets
+        bucket['volume'] += volume
+        if top > bucket['top_weight']:
+            bucket['top_weight'] = top
+        if e1rm > bucket['best_e1rm']:
+            bucket['best_e1rm'] = e1rm
+    return [buckets[key] for key in sorted(buckets)]
+
+
+def weekly_sets_by_body_part(store, exercise_db, start=None, end=None):
+    """{week: {body_part: sets}}; a set counts toward every body part its exercise lists."""
+    body_parts = [exercise_db.get(e, {}).get('body_parts') or ['Unknown'] for e in store.exercise_ids]
+    keys = _DayKeys("week")
+    weeks = {}
+    for day, e, sets, _, _, _ in store.summaries(start, end):
+        counts = weeks.setdefault(keys[day], {})
+        for body_part in body_parts[e]:
+            counts[body_part] = counts.get(body_part, 0) + sets
+    return {week: weeks[week] for week in sorted(weeks)}
+
+
+def volume_by_period(store, start=None, end=None, period="week"):
+    """{period: total tonnage (weight x reps over every set)}, from the store's daily tonnage."""
+    totals = {}
+    for date_str, tonnage in store.daily_volume(start, end):
+        key = period_key(date_str, period)
+        totals[key] = totals.get(key, 0.0) + tonnage
+    return totals
+
+
+def personal_records(store, start=None, end=None, exercise_ids=None):
+    """Dates on which an exercise beat its earlier best weight or estimated 1RM.
+
+    The first day an exercise appears in the range sets its baseline and isn't reported.
+    """
+    best = {}
+    records = []
+    for day, e, _, _, w, e1rm in store.summaries(start, end, exercise_ids):
+        previous = best.get(e)
+        if previous is None:
+            best[e] = (w, e1rm)
+            continue
+        day_str = date.fromordinal(day).isoformat()
+        if w > previous[0]:
+            records.append({'date': day_str, 'exercise_id': store.exercise_ids[e],
+                            'type': 'weight', 'value': w, 'previous': previous[0]})
+        if e1rm > previous[1]:
+            records.append({'date': day_str, 'exercise_id': store.exercise_ids[e],
+                            'type': 'e1rm', 'value': round(e1rm, 1), 'previous': round(previous[1], 1)})
+        best[e] = (max(w, previous[0]), max(e1rm, previous[1]))
+    return records
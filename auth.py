@@ -1,32 +1,63 @@
-import requests
+import asyncio
 import json
-from hashlib import md5
+import base64
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextvars import ContextVar
+from hashlib import md5, sha256
 from dotenv import load_dotenv
 import os
+import http_client
+from lru import LRUDict
+from metrics import METRICS
 
 # Yes - you read that right. You log in with raw MD5 hash of your password.
 # Note to Self: Do not use sensitive password on JEFit.
 
 load_dotenv()
 
-def get_access_token():
-    """Login and return a fresh access token."""
-    username = os.getenv("JEFIT_USERNAME")
-    password = os.getenv("JEFIT_PASSWORD")
-    
-    if not username or not password:
-        raise Exception("JEFIT_USERNAME and JEFIT_PASSWORD must be set in .env")
+# Fallback lifetime when the token carries no readable expiry, and how early
+# before expiry we log in again.
+DEFAULT_TOKEN_TTL = int(os.getenv("JEFIT_TOKEN_TTL", "3600"))
+TOKEN_REFRESH_MARGIN = int(os.getenv("JEFIT_TOKEN_REFRESH_MARGIN", "60"))
+
+# Maximum number of JEFit requests in flight at once for one account
+USER_CONCURRENCY = max(1, int(os.getenv("JEFIT_USER_CONCURRENCY", os.getenv("JEFIT_BATCH_CONCURRENCY", "4"))))
+
+# Most accounts whose state (sessions, calendars, set logs, ...) is kept in memory at once
+MAX_USER_SESSIONS = int(os.getenv("JEFIT_MAX_USER_SESSIONS", "1000"))
+
+
+def login_payload(username=None, password_md5=None):
+    """Request body for the login endpoint; defaults to the credentials configured in .env."""
+    if username is None:
+        username = os.getenv("JEFIT_USERNAME")
+        password = os.getenv("JEFIT_PASSWORD")
+        
+        if not username or not password:
+            raise Exception(
+                "JEFIT_USERNAME and JEFIT_PASSWORD must be set in .env "
+                "(or sent per request as X-JEFit-Username / X-JEFit-Password headers)"
+            )
+        password_md5 = md5(password.encode()).hexdigest()
     
-    data = {
+    return json.dumps({
         "platform": "web",
         "username": username,
-        "passwordMd5": md5(password.encode()).hexdigest()
-    }
+        "passwordMd5": password_md5
+    })
+
 
-    response = requests.post(
-        "https://www.jefit.com/api/v2/auth/login",
+@METRICS.timed("get_access_token")
+def get_access_token(username=None, password_md5=None):
+    """Login and return a fresh access token."""
+    response = http_client.post(
+        "/api/v2/auth/login",
+        endpoint='auth',
         headers={'content-type': 'application/json'},
-        data=json.dumps(data)
+        data=login_payload(username, password_md5)
     )
     
     if response.status_code != 200:
@@ -35,14 +66,291 @@ def get_access_token():
     return response.json()['accessToken']
 
 
+@METRICS.timed("get_user_id")
 def get_user_id(access_token):
     """Get user info from JEFit."""
     headers = {
         'content-type': 'application/json',
         'Cookie': f'jefitAccessToken={access_token}'
     }
-    response = requests.get("https://www.jefit.com/api/v2/user", headers=headers)
+    response = http_client.get("/api/v2/user", endpoint='auth', headers=headers)
     if response.status_code != 200:
         raise Exception(f"Failed to get user info from JEFit: {response.status_code} {response.text}")
     else:
         return response.json()['data']['id']
+
+
+@METRICS.timed("get_access_token")
+async def get_access_token_async(username=None, password_md5=None):
+    """Login and return a fresh access token without blocking the event loop."""
+    response = await http_client.post_async(
+        "/api/v2/auth/login",
+        endpoint='auth',
+        headers={'content-type': 'application/json'},
+        content=login_payload(username, password_md5)
+    )
+    
+    if response.status_code != 200:
+        raise Exception(f"Failed to login to JEFit: {response.status_code} {response.text}")
+    
+    return response.json()['accessToken']
+
+
+@METRICS.timed("get_user_id")
+async def get_user_id_async(access_token):
+    """Get user info from JEFit without blocking the event loop."""
+    response = await http_client.get_async("/api/v2/user", endpoint='auth', headers=auth_headers(access_token))
+    if response.status_code != 200:
+        raise Exception(f"Failed to get user info from JEFit: {response.status_code} {response.text}")
+    else:
+        return response.json()['data']['id']
+
+
+def decode_token_expiry(access_token):
+    """Return the `exp` claim of a JWT access token, or None if it has none."""
+    try:
+        payload = access_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp else None
+    except Exception:
+        return None
+
+
+class AuthSession:
+    """Cache of one account's JEFit access token and user id.
+
+    Logs in lazily and refreshes shortly before the token expires. Concurrent
+    callers, sync or async, share a single login in flight; the lock only
+    guards the cached token and is never held across a request. Async callers
+    also share a semaphore that caps the account's in-flight requests.
+
+    Credentials default to the ones configured in .env; a session created
+    from an access token alone re-validates that token instead of logging in.
+    """
+
+    def __init__(self, username=None, password_md5=None, access_token=None):
+        self._username = username
+        self._password_md5 = password_md5
+        self._provided_token = access_token
+        self._lock = threading.Lock()
+        # Future of the login in flight, resolving to (access_token, user_id)
+        self._login = None
+        self._access_token = None
+        self._user_id = None
+        self._expires_at = 0.0
+        self.logins = 0
+        self.cache_hits = 0
+        # asyncio semaphores are bound to one event loop, so keep one per loop
+        self._slots = weakref.WeakKeyDictionary()
+
+    def _is_fresh(self):
+        return self._access_token is not None and time.time() < self._expires_at - TOKEN_REFRESH_MARGIN
+
+    def _join_login(self):
+        """The cached credentials if still fresh, else the login in flight, started if there is none.
+
+        Returns (credentials, login future, whether this caller started the login).
+        """
+        with self._lock:
+            if self._is_fresh():
+                self.cache_hits += 1
+                return (self._access_token, self._user_id), None, False
+            if self._login is not None:
+                return None, self._login, False
+            login = self._login = Future()
+            login.set_running_or_notify_cancel()
+            return None, login, True
+
+    def _finish_login(self, login, credentials=None, error=None):
+        """Remember a finished login's token and hand its outcome to everyone waiting for it."""
+        with self._lock:
+            if credentials is not None:
+                self._remember(*credentials)
+            if self._login is login:
+                self._login = None
+        if login is None:
+            return
+        if credentials is not None:
+            login.set_result(credentials)
+        else:
+            # Waiters get an ordinary error even if the login was cancelled
+            login.set_exception(error if isinstance(error, Exception) else Exception("JEFit login was interrupted"))
+
+    def _log_in(self, login):
+        try:
+            access_token = self._provided_token or get_access_token(self._username, self._password_md5)
+            user_id = get_user_id(access_token)
+        except BaseException as e:
+            self._finish_login(login, error=e)
+            raise
+        self._finish_login(login, (access_token, user_id))
+        return access_token, user_id
+
+    def get_credentials(self):
+        """Return (access_token, user_id), logging in only when needed."""
+        credentials, login, started = self._join_login()
+        if credentials is not None:
+            return credentials
+        if started:
+            return self._log_in(login)
+        if _running_loop() is not None:
+            # Blocking on a login the event loop itself is running would never finish; log in separately
+            return self._log_in(None)
+        return login.result()
+
+    def _remember(self, access_token, user_id):
+        self._access_token = access_token
+        self._user_id = user_id
+        self._expires_at = decode_token_expiry(access_token) or time.time() + DEFAULT_TOKEN_TTL
+        self.logins += 1
+
+    def invalidate(self, access_token=None):
+        """Drop the cached token (only if it is still `access_token`, when given)."""
+        with self._lock:
+            if access_token is None or access_token == self._access_token:
+                self._access_token = None
+                self._user_id = None
+                self._expires_at = 0.0
+
+    def call(self, request_fn):
+        """Run `request_fn(access_token, user_id)`, retrying once on a 401."""
+        access_token, user_id = self.get_credentials()
+        response = request_fn(access_token, user_id)
+        if response.status_code == 401:
+            response.close()
+            self.invalidate(access_token)
+            access_token, user_id = self.get_credentials()
+            response = request_fn(access_token, user_id)
+        return response
+
+    def _request_slots(self):
+        """The account's request semaphore for the running event loop."""
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(USER_CONCURRENCY)
+        return slots
+
+    async def get_credentials_async(self):
+        """Async get_credentials(): waits for a login already in flight (sync or async) instead of starting another."""
+        credentials, login, started = self._join_login()
+        if credentials is not None:
+            return credentials
+        if not started:
+            return await asyncio.wrap_future(login)
+        try:
+            access_token = self._provided_token or await get_access_token_async(self._username, self._password_md5)
+            user_id = await get_user_id_async(access_token)
+        except BaseException as e:
+            self._finish_login(login, error=e)
+            raise
+        self._finish_login(login, (access_token, user_id))
+        return access_token, user_id
+
+    async def call_async(self, request_fn):
+        """Await `request_fn(access_token, user_id)` within the account's concurrency limit, retrying once on a 401."""
+        async with self._request_slots():
+            access_token, user_id = await self.get_credentials_async()
+            response = await request_fn(access_token, user_id)
+            if response.status_code == 401:
+                await response.aclose()
+                self.invalidate(access_token)
+                access_token, user_id = await self.get_credentials_async()
+                response = await request_fn(access_token, user_id)
+            return response
+
+    def stats(self):
+        return {
+            'logins': self.logins,
+            'cache_hits': self.cache_hits,
+            'token_expires_in': max(0, int(self._expires_at - time.time())) if self._access_token else 0,
+        }
+
+
+# Session for the account configured in .env, used when a request carries no credentials
+SESSION = AuthSession()
+
+_user_sessions = LRUDict(MAX_USER_SESSIONS)
+_user_sessions_lock = threading.Lock()
+
+# (account key, AuthSession) of the user the current request is served for
+_current_user = ContextVar("jefit_user", default=None)
+
+
+def _running_loop():
+    """The event loop running in this thread, or None."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def user_session(username=None, password=None, access_token=None):
+    """Shared AuthSession for per-request credentials (a username and password, or an access token).
+
+    Sessions are keyed by a hash of the full credentials, so a request with
+    a wrong password never reuses another request's login.
+    """
+    if access_token:
+        key = "token:" + sha256(access_token.encode()).hexdigest()
+    else:
+        password_md5 = md5(password.encode()).hexdigest()
+        key = "user:" + sha256(f"{username}\0{password_md5}".encode()).hexdigest()
+    
+    with _user_sessions_lock:
+        session = _user_sessions.touch(key)
+        if session is None:
+            if access_token:
+                session = AuthSession(access_token=access_token)
+            else:
+                session = AuthSession(username, password_md5)
+            _user_sessions[key] = session
+        return session
+
+
+async def activate_user(username=None, password=None, access_token=None):
+    """Verify per-request credentials and serve the current context as that user.
+
+    Returns a token for deactivate_user(). Per-account caches are keyed by the
+    lowercased username, or by the JEFit user id for token-only requests.
+    """
+    session = user_session(username, password, access_token)
+    _, user_id = await session.get_credentials_async()
+    account = username.strip().lower() if username and not access_token else f"id:{user_id}"
+    return _current_user.set((account, session))
+
+
+def deactivate_user(token):
+    _current_user.reset(token)
+
+
+def current_session():
+    """AuthSession of the user the current request is served for (the .env account by default)."""
+    user = _current_user.get()
+    return user[1] if user is not None else SESSION
+
+
+def user_session_count():
+    return len(_user_sessions)
+
+
+def get_credentials():
+    """Return a cached (access_token, user_id) pair."""
+    return current_session().get_credentials()
+
+
+def account_key():
+    """Stable key for per-account caches that doesn't require logging in."""
+    user = _current_user.get()
+    if user is not None:
+        return user[0]
+    return (os.getenv("JEFIT_USERNAME") or "").strip().lower()
+
+
+def auth_headers(access_token):
+    """Standard JSON API headers carrying the JEFit access token cookie."""
+    return {
+        'content-type': 'application/json',
+        'Cookie': f'jefitAccessToken={access_token}'
+    }
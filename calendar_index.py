@@ -0,0 +1,143 @@
+"""
+Locally persisted, sorted index of workout calendar dates.
+
+The calendar is kept in the session SQLite database and mirrored in memory as
+a sorted list of ISO dates, so range queries are a pair of bisects instead of
+parsing every date on every call. A sync is only performed once the last sync
+watermark is older than CALENDAR_TTL, and only changed rows are written back.
+"""
+
+import json
+import os
+import time
+from bisect import bisect_left, bisect_right, insort
+from dotenv import load_dotenv
+from auth import MAX_USER_SESSIONS
+from lru import LRUDict
+from session_store import DB_PATH, session_db
+
+load_dotenv()
+
+CALENDAR_TTL = int(os.getenv("JEFIT_CALENDAR_TTL", "300"))
+
+SCHEMA = ("""
+    CREATE TABLE IF NOT EXISTS calendar (
+        account TEXT NOT NULL,
+        date TEXT NOT NULL,
+        has_logs INTEGER NOT NULL,
+        meta TEXT NOT NULL,
+        PRIMARY KEY (account, date)
+    )
+""", """
+    CREATE TABLE IF NOT EXISTS calendar_sync (
+        account TEXT PRIMARY KEY,
+        synced_at REAL NOT NULL
+    )
+""")
+
+
+class _AccountCalendar:
+    """In-memory view of one account's calendar."""
+
+    def __init__(self):
+        self.entries = {}
+        self.logged_dates = []
+        self.synced_at = 0.0
+
+
+class CalendarIndex:
+    def __init__(self, path=DB_PATH):
+        self._db = session_db(path)
+        self._lock = self._db.lock
+        # Accounts' calendars in memory; evicted ones are reloaded from disk
+        self._accounts = LRUDict(MAX_USER_SESSIONS)
+        self.syncs = 0
+
+    def _connection(self):
+        return self._db.connection(SCHEMA)
+
+    def _account(self, account):
+        """Return the account's in-memory calendar, loading it from disk on first use."""
+        calendar = self._accounts.touch(account)
+        if calendar is None:
+            calendar = _AccountCalendar()
+            conn = self._connection()
+            for date_str, meta in conn.execute(
+                "SELECT date, meta FROM calendar WHERE account = ? ORDER BY date", (account,)
+            ):
+                entry = json.loads(meta)
+                calendar.entries[date_str] = entry
+                if entry.get('has_logs'):
+                    calendar.logged_dates.append(date_str)
+            row = conn.execute("SELECT synced_at FROM calendar_sync WHERE account = ?", (account,)).fetchone()
+            calendar.synced_at = row[0] if row else 0.0
+            self._accounts[account] = calendar
+        return calendar
+
+    def needs_sync(self, account, max_age=CALENDAR_TTL):
+        with self._lock:
+            return time.time() - self._account(account).synced_at >= max_age
+
+    def expire(self, account):
+        """Force the next workout_dates() lookup for `account` to sync with JEFit again."""
+        with self._lock:
+            self._account(account).synced_at = 0.0
+
+    def merge(self, account, calendar_data):
+        """Merge a fetched calendar, writing only rows that changed. Returns the number of changed rows."""
+        with self._lock:
+            calendar = self._account(account)
+            changed = []
+            seen = set()
+            for entry in calendar_data:
+                date_str = entry['date']
+                seen.add(date_str)
+                if calendar.entries.get(date_str) != entry:
+                    changed.append(entry)
+            removed = [d for d in calendar.entries if d not in seen]
+
+            for entry in changed:
+                date_str = entry['date']
+                was_logged = bool(calendar.entries.get(date_str, {}).get('has_logs'))
+                calendar.entries[date_str] = entry
+                if entry.get('has_logs') and not was_logged:
+                    insort(calendar.logged_dates, date_str)
+                elif was_logged and not entry.get('has_logs'):
+                    calendar.logged_dates.remove(date_str)
+            for date_str in removed:
+                if calendar.entries.pop(date_str).get('has_logs'):
+                    calendar.logged_dates.remove(date_str)
+            calendar.synced_at = time.time()
+
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO calendar (account, date, has_logs, meta) VALUES (?, ?, ?, ?)",
+                [(account, e['date'], int(bool(e.get('has_logs'))), json.dumps(e, separators=(',', ':'))) for e in changed]
+            )
+            conn.executemany(
+                "DELETE FROM calendar WHERE account = ? AND date = ?",
+                [(account, d) for d in removed]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO calendar_sync (account, synced_at) VALUES (?, ?)",
+                (account, calendar.synced_at)
+            )
+            conn.commit()
+            self.syncs += 1
+            return len(changed) + len(removed)
+
+    def workout_dates(self, account, start=None, end=None):
+        """Dates with logs in [start, end] (ISO strings, both inclusive and optional)."""
+        with self._lock:
+            dates = self._account(account).logged_dates
+            lo = bisect_left(dates, start) if start else 0
+            hi = bisect_right(dates, end) if end else len(dates)
+            return dates[lo:hi]
+
+    def entry(self, account, date_str):
+        """Raw calendar metadata for a date, or None."""
+        with self._lock:
+            return self._account(account).entries.get(date_str)
+
+
+CALENDAR = CalendarIndex()
@@ -0,0 +1,230 @@
+"""
+Compact, read-only exercise catalog stored in SQLite.
+
+Body parts and equipment are interned into small integer enums and stored per
+exercise as a blob of enum ids (one byte each, order preserved). Server
+processes open the file read-only with SQLite's memory-mapped I/O, so every
+process on a host shares the same page-cache pages instead of each holding a
+parsed copy of the JSON catalog.
+
+The catalog is shared by every user on the host, so it only holds JEFit's
+own exercises; each user's custom (`u_`) exercises are kept per account in
+custom_exercises.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+CATALOG_PATH = Path('data/exercises.sqlite')
+LEGACY_JSON_PATH = Path('data/exercises_db.json')
+
+MMAP_SIZE = 64 * 1024 * 1024
+
+
+def is_custom(exercise_id):
+    """Whether an exercise was created by a user rather than shipped by JEFit."""
+    return exercise_id.startswith('u_')
+
+
+def split_custom(exercises):
+    """Split an exercise dict into (JEFit exercises, custom exercises)."""
+    shared = {}
+    custom = {}
+    for exercise_id, exercise in exercises.items():
+        (custom if is_custom(exercise_id) else shared)[exercise_id] = exercise
+    return shared, custom
+
+
+def _intern(values, table):
+    """Map each value to its enum id, assigning new ids as needed."""
+    ids = []
+    for value in values:
+        if value not in table:
+            table[value] = len(table)
+        ids.append(table[value])
+    return bytes(ids)
+
+
+def write_catalog(exercises, path=CATALOG_PATH, meta=None):
+    """Write an exercise dict (as produced by fetch_exercise_database) to a catalog file.
+
+    The file is built next to the target and renamed into place, so readers
+    never see a half-written catalog. `meta` holds string metadata. Custom
+    exercises are left out.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    body_parts = {}
+    equipment = {}
+    rows = []
+    for exercise_id, exercise in exercises.items():
+        if is_custom(exercise_id):
+            continue
+        rows.append((
+            exercise_id,
+            exercise.get('name'),
+            _intern(exercise.get('body_parts', []), body_parts),
+            _intern(exercise.get('equipment', []), equipment),
+            exercise.get('input_format'),
+            exercise.get('popularity'),
+        ))
+    if len(body_parts) > 256 or len(equipment) > 256:
+        raise ValueError("Too many distinct body parts or equipment values for a one-byte enum")
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE body_parts (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+        conn.execute("CREATE TABLE equipment (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.execute("""
+            CREATE TABLE exercises (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                body_parts BLOB NOT NULL,
+                equipment BLOB NOT NULL,
+                input_format,
+                popularity
+            ) WITHOUT ROWID
+        """)
+        conn.executemany("INSERT INTO body_parts VALUES (?, ?)", [(i, n) for n, i in body_parts.items()])
+        conn.executemany("INSERT INTO equipment VALUES (?, ?)", [(i, n) for n, i in equipment.items()])
+        conn.executemany("INSERT INTO exercises VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", sorted((meta or {}).items()))
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+
+
+class CatalogDB(Mapping):
+    """Read-only mapping of exercise_id -> exercise dict backed by a catalog file.
+
+    Rows are decoded on first access and memoized, so repeated lookups of the
+    same exercise are plain dict hits.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{self.path.resolve()}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        self._body_parts = tuple(n for _, n in self._conn.execute("SELECT id, name FROM body_parts ORDER BY id"))
+        self._equipment = tuple(n for _, n in self._conn.execute("SELECT id, name FROM equipment ORDER BY id"))
+        self._len = self._conn.execute("SELECT COUNT(*) FROM exercises").fetchone()[0]
+        try:
+            self.meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        except sqlite3.OperationalError:
+            # Written before catalogs recorded metadata
+            self.meta = {}
+        self._memo = {}
+
+    def _decode(self, row):
+        exercise_id, name, body_parts, equipment, input_format, popularity = row
+        return {
+            'id': exercise_id,
+            'name': name,
+            'body_parts': [self._body_parts[i] for i in body_parts],
+            'equipment': [self._equipment[i] for i in equipment],
+            'input_format': input_format,
+            'popularity': popularity,
+        }
+
+    def __getitem__(self, exercise_id):
+        exercise = self._memo.get(exercise_id)
+        if exercise is not None:
+            return exercise
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, body_parts, equipment, input_format, popularity FROM exercises WHERE id = ?",
+                (exercise_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(exercise_id)
+        exercise = self._decode(row)
+        self._memo[exercise_id] = exercise
+        return exercise
+
+    def __iter__(self):
+        with self._lock:
+            ids = [r[0] for r in self._conn.execute("SELECT id FROM exercises")]
+        return iter(ids)
+
+    def exercises(self):
+        """Every exercise, decoded from a single query and not memoized."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, body_parts, equipment, input_format, popularity FROM exercises"
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+
+    def __len__(self):
+        return self._len
+
+    def close(self):
+        self._conn.close()
+
+
+def merge_catalog(exercises, path=CATALOG_PATH, meta=None):
+    """Merge fetched exercises into a catalog file and return how many were new or changed.
+
+    Exercises the fetch didn't include are kept, so older sessions still
+    resolve their names. The file is only rewritten when an exercise or the
+    metadata changed.
+    """
+    current = {}
+    current_meta = {}
+    if Path(path).exists():
+        catalog = CatalogDB(path)
+        try:
+            current = {exercise_id: catalog[exercise_id] for exercise_id in catalog}
+            current_meta = catalog.meta
+        finally:
+            catalog.close()
+
+    changed = {
+        exercise_id: exercise for exercise_id, exercise in exercises.items()
+        if not is_custom(exercise_id) and current.get(exercise_id) != exercise
+    }
+    meta = current_meta if meta is None else meta
+    if changed or meta != current_meta:
+        current.update(changed)
+        write_catalog(current, path, meta)
+    return len(changed)
+
+
+def strip_custom_exercises(path=CATALOG_PATH):
+    """Rewrite a catalog written before custom exercises were kept per account without them.
+
+    Their owners have no stored validators yet, so their next refresh
+    downloads the page in full and fetches the custom exercises again.
+    Returns how many exercises were removed.
+    """
+    catalog = CatalogDB(path)
+    try:
+        exercise_ids = list(catalog)
+        custom = sum(1 for exercise_id in exercise_ids if is_custom(exercise_id))
+        if custom:
+            exercises = {exercise_id: catalog[exercise_id] for exercise_id in exercise_ids}
+    finally:
+        catalog.close()
+    if custom:
+        write_catalog(exercises, path)
+    return custom
+
+
+def migrate_json(json_path=LEGACY_JSON_PATH, path=CATALOG_PATH):
+    """Convert a legacy exercises_db.json cache into a catalog file."""
+    with open(json_path, 'r') as f:
+        exercises = json.load(f)
+    write_catalog(exercises, path)
+    return len(exercises)
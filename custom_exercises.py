@@ -0,0 +1,99 @@
+"""
+Custom exercises, kept per account.
+
+Exercises a user created themselves (ids starting with `u_`) only exist in
+that user's history page, so they never go into the shared catalog file.
+Each account's custom exercises are stored in the session SQLite database and
+mirrored in memory; an account's dict is replaced, never mutated, when its
+exercises change. The HTTP validators (ETag / Last-Modified) of the history
+page each account last fetched are stored alongside, since the page differs
+per user.
+"""
+
+import json
+from auth import MAX_USER_SESSIONS
+from lru import LRUDict
+from session_store import DB_PATH, session_db
+
+SCHEMA = ("""
+    CREATE TABLE IF NOT EXISTS custom_exercises (
+        account TEXT NOT NULL,
+        id TEXT NOT NULL,
+        exercise TEXT NOT NULL,
+        PRIMARY KEY (account, id)
+    )
+""", """
+    CREATE TABLE IF NOT EXISTS history_validators (
+        account TEXT PRIMARY KEY,
+        validators TEXT NOT NULL
+    )
+""")
+
+
+class CustomExercises:
+    def __init__(self, path=DB_PATH):
+        self._db = session_db(path)
+        self._lock = self._db.lock
+        # Accounts' custom exercises in memory
+        self._accounts = LRUDict(MAX_USER_SESSIONS)
+
+    def _connection(self):
+        return self._db.connection(SCHEMA)
+
+    def _account(self, account):
+        """The account's custom exercises, loaded from disk on first use."""
+        exercises = self._accounts.touch(account)
+        if exercises is None:
+            exercises = {
+                exercise_id: json.loads(exercise)
+                for exercise_id, exercise in self._connection().execute(
+                    "SELECT id, exercise FROM custom_exercises WHERE account = ?", (account,)
+                )
+            }
+            self._accounts[account] = exercises
+        return exercises
+
+    def get(self, account):
+        """{exercise_id: exercise} of the account's custom exercises (don't modify it)."""
+        with self._lock:
+            return self._account(account)
+
+    def merge(self, account, exercises):
+        """Merge fetched custom exercises for an account. Returns how many were new or changed."""
+        with self._lock:
+            current = self._account(account)
+            changed = {
+                exercise_id: exercise for exercise_id, exercise in exercises.items()
+                if current.get(exercise_id) != exercise
+            }
+            if not changed:
+                return 0
+            self._accounts[account] = {**current, **changed}
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO custom_exercises (account, id, exercise) VALUES (?, ?, ?)",
+                [(account, exercise_id, json.dumps(e, separators=(',', ':'))) for exercise_id, e in changed.items()]
+            )
+            conn.commit()
+            return len(changed)
+
+    def validators(self, account):
+        """Validators of the history page the account last fetched, or {}."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT validators FROM history_validators WHERE account = ?", (account,)
+            ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def set_validators(self, account, validators):
+        """Record the validators of the account's latest history page (after its exercises were merged)."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO history_validators (account, validators) VALUES (?, ?)",
+                (account, json.dumps(validators or {}))
+            )
+            conn.commit()
+
+
+CUSTOM_EXERCISES = CustomExercises()
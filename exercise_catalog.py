@@ -0,0 +1,228 @@
+"""
+Lazily loaded exercise catalog.
+
+Loading the exercise database can mean downloading and parsing the whole RSC
+history page, so it runs on a background thread instead of blocking server
+startup. Callers wait a bounded amount of time for it and fall back to an
+empty catalog (exercises render as "Unknown Exercise") if it isn't ready.
+
+The catalog of JEFit's exercises is shared by every user of the process.
+The loader runs with the credentials of whichever caller started it, and an
+attempt that came up empty (e.g. no credentials were configured at startup)
+is retried by a later caller. Each caller sees it together with their own
+custom exercises, which are kept per account.
+
+When a workout references an exercise the caller's catalog doesn't know
+(typically a newly created custom exercise), the catalog is refreshed in the
+background with a conditional request and only new or changed exercises are
+merged in. Ids a refresh couldn't resolve for an account don't trigger
+another refresh for that account.
+"""
+
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from itertools import chain
+from dotenv import load_dotenv
+from auth import MAX_USER_SESSIONS, account_key
+from catalog_db import is_custom
+from custom_exercises import CUSTOM_EXERCISES
+from lru import LRUDict
+from workout_info import load_exercise_db, refresh_exercise_db
+
+load_dotenv()
+
+# How long a tool call waits for a still-loading catalog before falling back
+LOAD_WAIT_TIMEOUT = float(os.getenv("JEFIT_EXERCISE_DB_WAIT", "10"))
+
+# Minimum seconds between attempts after a load produced an empty catalog
+LOAD_RETRY_INTERVAL = float(os.getenv("JEFIT_EXERCISE_DB_RETRY", "300"))
+
+# Minimum seconds between refreshes triggered by unknown exercise ids
+REFRESH_INTERVAL = float(os.getenv("JEFIT_EXERCISE_DB_REFRESH", "300"))
+
+
+class AccountCatalog(Mapping):
+    """The shared catalog plus one account's custom exercises, as one read-only mapping."""
+
+    def __init__(self, shared, custom):
+        self.shared = shared
+        self.custom = custom
+
+    def __getitem__(self, exercise_id):
+        if is_custom(exercise_id):
+            return self.custom[exercise_id]
+        return self.shared[exercise_id]
+
+    def __iter__(self):
+        return chain(self.shared, self.custom)
+
+    def __len__(self):
+        return len(self.shared) + len(self.custom)
+
+
+class ExerciseCatalog:
+    def __init__(self, loader=load_exercise_db, refresher=refresh_exercise_db):
+        self._loader = loader
+        self._refresher = refresher
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._thread = None
+        self._finished_at = None
+        self._refresh_thread = None
+        # Account -> monotonic time of its last refresh
+        self._refreshed_at = LRUDict(MAX_USER_SESSIONS)
+        # Account -> ids its refreshes couldn't resolve
+        self._unresolved = LRUDict(MAX_USER_SESSIONS)
+        self._db = {}
+        self._views = LRUDict(MAX_USER_SESSIONS)
+        self.load_seconds = None
+        self.error = None
+        self.refreshes = 0
+        self.refreshed_exercises = 0
+
+    def _load(self):
+        started = time.perf_counter()
+        try:
+            self._db = self._loader() or {}
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.load_seconds = time.perf_counter() - started
+            self._finished_at = time.monotonic()
+            self._loaded.set()
+
+    def _should_start(self):
+        if self._thread is None:
+            return True
+        # Retry an empty result, but not more often than LOAD_RETRY_INTERVAL
+        return (
+            not self._db
+            and self._finished_at is not None
+            and time.monotonic() - self._finished_at >= LOAD_RETRY_INTERVAL
+        )
+
+    def start_loading(self):
+        """Start loading in the background (no-op if already started or loaded)."""
+        with self._lock:
+            if self._should_start():
+                # Run with the caller's context so the loader uses the current user's credentials
+                context = contextvars.copy_context()
+                self._finished_at = None
+                self._thread = threading.Thread(
+                    target=context.run, args=(self._load,), name="exercise-db-loader", daemon=True
+                )
+                self._thread.start()
+
+    def _view(self):
+        """The catalog as the current account sees it, reused while neither part changes."""
+        account = account_key()
+        shared = self._db
+        custom = CUSTOM_EXERCISES.get(account)
+        with self._lock:
+            view = self._views.touch(account)
+            if view is None or view.shared is not shared or view.custom is not custom:
+                view = self._views[account] = AccountCatalog(shared, custom)
+            return view
+
+    def get_db(self, timeout=LOAD_WAIT_TIMEOUT):
+        """Return the current account's catalog, waiting up to `timeout` seconds for it to load."""
+        self.start_loading()
+        self._loaded.wait(timeout)
+        return self._view()
+
+    async def get_db_async(self, timeout=LOAD_WAIT_TIMEOUT):
+        """get_db() for coroutines: waits for the loader off the event loop."""
+        self.start_loading()
+        if not self._loaded.is_set():
+            await asyncio.to_thread(self._loaded.wait, timeout)
+        return self._view()
+
+    def is_loaded(self):
+        return self._loaded.is_set()
+
+    def _replace_db(self, db):
+        """Swap in a reopened catalog.
+
+        The old one isn't closed here: a tool call may still hold a view of it
+        across a long await. Its connection closes when the last view is dropped.
+        """
+        with self._lock:
+            self._db = db
+            self._views.clear()
+
+    def _refresh(self, account, missing):
+        try:
+            shared_changed, custom_changed = self._refresher()
+            self.refreshes += 1
+            if shared_changed:
+                # Reopen the file the refresh renamed into place
+                db = self._loader()
+                if db:
+                    self._replace_db(db)
+            changed = shared_changed + custom_changed
+            if changed:
+                self.refreshed_exercises += changed
+                print(f"✓ Exercise database refreshed: {changed} new or changed exercises", file=sys.stderr)
+            db = self._view()
+            unresolved = {exercise_id for exercise_id in missing if exercise_id not in db}
+            if unresolved:
+                with self._lock:
+                    self._unresolved[account] = self._unresolved.get(account, frozenset()) | unresolved
+                print(f"⚠️  {len(unresolved)} exercises not found in JEFit's exercise list; "
+                      f"they won't trigger another refresh for this account", file=sys.stderr)
+        except Exception as e:
+            print(f"⚠️  Failed to refresh exercise database: {e}", file=sys.stderr)
+
+    def refresh_if_unknown(self, exercise_ids):
+        """Refresh the catalog in the background if any of `exercise_ids` is missing from the caller's view of it.
+
+        At most one refresh runs at a time, and one account's not more often
+        than REFRESH_INTERVAL. Ids an earlier refresh for the same account couldn't
+        resolve are ignored.
+        """
+        if not self._db or not self._loaded.is_set():
+            return
+        account = account_key()
+        db = self._view()
+        unresolved = self._unresolved.get(account, frozenset())
+        missing = {
+            exercise_id for exercise_id in set(exercise_ids)
+            if exercise_id not in db and exercise_id not in unresolved
+        }
+        if not missing:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            last = self._refreshed_at.get(account)
+            if last is not None and now - last < REFRESH_INTERVAL:
+                return
+            self._refreshed_at[account] = now
+            # Refresh with the credentials of the user whose workout referenced the exercise
+            context = contextvars.copy_context()
+            self._refresh_thread = threading.Thread(
+                target=context.run, args=(self._refresh, account, missing), name="exercise-db-refresh", daemon=True
+            )
+            self._refresh_thread.start()
+
+    def stats(self):
+        with self._lock:
+            unresolved = sum(len(ids) for ids in self._unresolved.values())
+        return {
+            'loaded': self.is_loaded(),
+            'exercises': len(self._db),
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'error': self.error,
+            'refreshes': self.refreshes,
+            'refreshed_exercises': self.refreshed_exercises,
+            'unresolved_exercises': unresolved,
+        }
+
+
+EXERCISE_CATALOG = ExerciseCatalog()
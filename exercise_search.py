@@ -0,0 +1,206 @@
+"""
+In-memory search index over the exercise catalog.
+
+Built once per loaded catalog: inverted indexes from body part and equipment
+to exercises, and word, word-prefix and trigram indexes over exercise names
+for forgiving name lookups ("incline db press", "tricep pushdwn"). Results
+are ranked by how well the name matches, then by JEFit popularity.
+
+The shared catalog's index is built from a single query and kept while the
+catalog is loaded. A caller's own custom exercises get a small index of
+their own per search, so nobody finds another user's custom exercises.
+"""
+
+import re
+from catalog_db import is_custom
+
+# Share of a query word's trigrams a name must contain to count as a fuzzy match
+MIN_TRIGRAM_SIMILARITY = 0.5
+WORD_SCORE = 1.0
+PREFIX_SCORE = 0.8
+FUZZY_SCORE = 0.6
+# Lowest average per-word score a result needs (a lone typo'd word still qualifies)
+MIN_SCORE = FUZZY_SCORE * MIN_TRIGRAM_SIMILARITY
+
+# Common gym shorthand expanded before matching
+ALIASES = {
+    'db': "dumbbell",
+    'bb': "barbell",
+    'kb': "kettlebell",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [ALIASES.get(word, word) for word in _WORD_RE.findall(text.lower())]
+
+
+def trigrams(word):
+    padded = f" {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _rank(exercise):
+    return -(exercise.get('popularity') or 0), exercise.get('name') or ""
+
+
+class ExerciseIndex:
+    def __init__(self, exercises):
+        # Positions follow popularity, so sorting positions ranks equally good matches
+        exercises = sorted(exercises, key=_rank)
+        self.exercises = exercises
+        self._positions = {e['id']: pos for pos, e in enumerate(exercises)}
+        self._words = {}
+        self._prefixes = {}
+        self._trigrams = {}
+        self._body_parts = {}
+        self._equipment = {}
+        for pos, exercise in enumerate(exercises):
+            for word in set(tokenize(exercise.get('name') or "")):
+                self._words.setdefault(word, set()).add(pos)
+                for end in range(1, len(word)):
+                    self._prefixes.setdefault(word[:end], set()).add(pos)
+                for gram in trigrams(word):
+                    self._trigrams.setdefault(gram, set()).add(pos)
+            for body_part in exercise.get('body_parts') or []:
+                self._body_parts.setdefault(body_part.lower(), set()).add(pos)
+            for equipment in exercise.get('equipment') or []:
+                self._equipment.setdefault(equipment.lower(), set()).add(pos)
+
+    def __len__(self):
+        return len(self.exercises)
+
+    def body_parts(self):
+        return sorted(self._body_parts)
+
+    def equipment(self):
+        return sorted(self._equipment)
+
+    def _facet(self, table, value):
+        """Positions tagged `value`, or with any tag containing it ("back" -> upper and lower back)."""
+        value = value.strip().lower()
+        if value in table:
+            return table[value]
+        matches = set()
+        for tag, positions in table.items():
+            if value in tag:
+                matches |= positions
+        return matches
+
+    def _candidates(self, body_part=None, equipment=None):
+        candidates = None
+        for table, value in ((self._body_parts, body_part), (self._equipment, equipment)):
+            if value:
+                positions = self._facet(table, value)
+                candidates = positions if candidates is None else candidates & positions
+        return candidates
+
+    def _word_scores(self, word):
+        """Score of each exercise for one query word.
+
+        Exact words and word prefixes win; only a word that matches neither
+        (likely a typo) falls back to the share of its trigrams in the name.
+        """
+        scores = {}
+        for pos in self._prefixes.get(word, ()):
+            scores[pos] = PREFIX_SCORE
+        for pos in self._words.get(word, ()):
+            scores[pos] = WORD_SCORE
+        if scores:
+            return scores
+
+        grams = trigrams(word)
+        counts = {}
+        for gram in grams:
+            for pos in self._trigrams.get(gram, ()):
+                counts[pos] = counts.get(pos, 0) + 1
+        for pos, shared in counts.items():
+            similarity = shared / len(grams)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                scores[pos] = FUZZY_SCORE * similarity
+        return scores
+
+    def search(self, query=None, body_part=None, equipment=None, limit=20):
+        """Exercises matching a name query and/or body part and equipment, best match first.
+
+        Returns (exercise, score) pairs; score is 1.0 when every query word
+        appears in the name, and always 1.0 without a query.
+        """
+        candidates = self._candidates(body_part, equipment)
+        if query and query in self._positions:
+            exact = self._positions[query]
+            return [(self.exercises[exact], 1.0)] if candidates is None or exact in candidates else []
+
+        words = tokenize(query or "")
+        if not words:
+            if candidates is None:
+                return []
+            return [(self.exercises[pos], 1.0) for pos in sorted(candidates)[:limit]]
+
+        totals = {}
+        for word in words:
+            for pos, score in self._word_scores(word).items():
+                if candidates is None or pos in candidates:
+                    totals[pos] = totals.get(pos, 0.0) + score
+        matches = [(score / len(words), pos) for pos, score in totals.items() if score / len(words) >= MIN_SCORE]
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return [(self.exercises[pos], round(score, 3)) for score, pos in matches[:limit]]
+
+    def matching_ids(self, query=None, body_part=None, equipment=None):
+        """Ids of every exercise search() would return, in ranked order."""
+        return [exercise['id'] for exercise, _ in self.search(query, body_part, equipment, limit=None)]
+
+
+class AccountIndex:
+    """The shared catalog's index and an account's custom exercise index, searched as one."""
+
+    def __init__(self, shared, custom):
+        self._indexes = (shared, custom)
+
+    def __len__(self):
+        return sum(len(index) for index in self._indexes)
+
+    def body_parts(self):
+        return sorted({body_part for index in self._indexes for body_part in index.body_parts()})
+
+    def equipment(self):
+        return sorted({equipment for index in self._indexes for equipment in index.equipment()})
+
+    def search(self, query=None, body_part=None, equipment=None, limit=20):
+        """ExerciseIndex.search() over both indexes, merged by score and then popularity."""
+        matches = [
+            match for index in self._indexes
+            for match in index.search(query, body_part, equipment, limit)
+        ]
+        matches.sort(key=lambda match: (-match[1], *_rank(match[0])))
+        return matches[:limit]
+
+    def matching_ids(self, query=None, body_part=None, equipment=None):
+        return [exercise['id'] for exercise, _ in self.search(query, body_part, equipment, limit=None)]
+
+
+def catalog_exercises(catalog):
+    """JEFit exercises of a shared catalog, read in one pass (without filling a CatalogDB's memo)."""
+    exercises = catalog.exercises() if hasattr(catalog, 'exercises') else catalog.values()
+    return [exercise for exercise in exercises if not is_custom(exercise['id'])]
+
+
+_index = None
+_index_catalog = None
+
+
+def get_exercise_index(exercise_db):
+    """Search index for `exercise_db`, the shared catalog plus the caller's custom exercises.
+
+    The shared part is rebuilt only when the shared catalog object changes.
+    """
+    global _index, _index_catalog
+    shared = getattr(exercise_db, 'shared', exercise_db)
+    custom = getattr(exercise_db, 'custom', None)
+    if _index is None or _index_catalog is not shared:
+        _index = ExerciseIndex(catalog_exercises(shared))
+        _index_catalog = shared
+    if not custom:
+        return _index
+    return AccountIndex(_index, ExerciseIndex(custom.values()))
@@ -1,33 +1,55 @@
-import requests
+import asyncio
+import http_client
 import json
 import os 
 from dotenv import load_dotenv
-from auth import get_access_token, get_user_id
+from auth import current_session, auth_headers, account_key
+from calendar_index import CALENDAR
+from single_flight import FLIGHTS
+from metrics import METRICS
 load_dotenv()
 
-def get_workout_history():
-    access_token = get_access_token()
-    user_id = get_user_id(access_token)
+@METRICS.timed("fetch_calendar")
+async def fetch_calendar():
+    """Download the full workout calendar from JEFit."""
     timezone_offset = os.getenv("JEFIT_TIMEZONE", "-04:00")
 
-    headers = {
-        'content-type': 'application/json',
-        'Cookie': f'jefitAccessToken={access_token}'
-    }
-    response = requests.get(f"https://www.jefit.com/api/v2/users/{user_id}/sessions/calendar?timezone_offset={timezone_offset}", headers=headers)
+    async def fetch(access_token, user_id):
+        return await http_client.get_async(
+            f"/api/v2/users/{user_id}/sessions/calendar",
+            params={'timezone_offset': timezone_offset},
+            headers=auth_headers(access_token)
+        )
+
+    response = await current_session().call_async(fetch)
     if response.status_code != 200:
         raise Exception(f"Failed to get workout history: {response.status_code} {response.text}")
     else:
         calendar = response.json()
-        calendar_data = calendar["data"]
-        workouts = []
-        for workout in calendar_data:
-            # We will skip if the workout has no logs
-            if not workout["has_logs"]:
-                continue
-            workouts.append(workout["date"])
-        return workouts
+        return calendar["data"]
+
+
+async def sync_calendar(force=False):
+    """Refresh the local calendar index if its sync watermark has expired."""
+    account = account_key()
+    if force or CALENDAR.needs_sync(account):
+        METRICS.count('calendar_lookups', source='upstream')
+        # Concurrent syncs for the same account share one download
+        CALENDAR.merge(account, await FLIGHTS.do_async(("calendar", account), fetch_calendar))
+    else:
+        METRICS.count('calendar_lookups', source='cache')
+    return account
+
+
+async def get_workout_dates(start_date=None, end_date=None):
+    """Sorted workout dates (with logs) between two YYYY-MM-DD dates, inclusive."""
+    account = await sync_calendar()
+    return CALENDAR.workout_dates(account, start_date, end_date)
+
+
+async def get_workout_history():
+    return await get_workout_dates()
 
 if __name__ == "__main__":
-    workouts = get_workout_history()
+    workouts = asyncio.run(get_workout_history())
     print(workouts)
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""
+Shared HTTP client for every JEFit call.
+
+Keeps one pooled, keep-alive requests.Session per process so tool calls reuse
+TCP/TLS connections, applies per-endpoint connect/read timeouts, negotiates
+compressed responses and retries with jittered backoff on 429 and 5xx
+responses. Every attempt goes through the shared rate limiter and is counted
+in the metrics, along with the bytes downloaded.
+
+Tool calls go through the async counterpart (one pooled httpx.AsyncClient per
+event loop) so a slow JEFit response doesn't stall other clients of the
+HTTP transport; the blocking session serves background threads.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from rate_limit import LIMITER
+from metrics import METRICS
+
+load_dotenv()
+
+BASE_URL = os.getenv("JEFIT_BASE_URL", "https://www.jefit.com").rstrip('/')
+
+POOL_SIZE = int(os.getenv("JEFIT_HTTP_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.getenv("JEFIT_HTTP_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("JEFIT_HTTP_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Longest Retry-After honoured; a response asking for more is returned without retrying
+MAX_RETRY_AFTER = float(os.getenv("JEFIT_MAX_RETRY_AFTER", "60"))
+
+CONNECT_TIMEOUT = float(os.getenv("JEFIT_CONNECT_TIMEOUT", "5"))
+
+# (connect, read) timeouts in seconds per endpoint family
+TIMEOUTS = {
+    'auth': (CONNECT_TIMEOUT, float(os.getenv("JEFIT_AUTH_READ_TIMEOUT", "15"))),
+    'api': (CONNECT_TIMEOUT, float(os.getenv("JEFIT_API_READ_TIMEOUT", "20"))),
+    # The RSC history page is by far the largest response we download
+    'rsc': (CONNECT_TIMEOUT, float(os.getenv("JEFIT_RSC_READ_TIMEOUT", "60"))),
+}
+
+
+def _accept_encoding():
+    """Only advertise brotli when urllib3 can actually decode it."""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return "gzip, deflate, br"
+        except ImportError:
+            return "gzip, deflate"
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    # urllib3 only retries failed connections and reads; retrying on status
+    # codes happens in request() so every attempt passes the rate limiter
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=0,
+        backoff_factor=RETRY_BACKOFF,
+        backoff_jitter=RETRY_BACKOFF,
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        'Accept-Encoding': _accept_encoding(),
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def url_for(path):
+    """Build an absolute JEFit URL from an API path."""
+    if path.startswith("http://") or path.startswith("https://"):
+        return path
+    return f"{BASE_URL}{path}"
+
+
+def retry_after_seconds(response):
+    """The response's Retry-After header in seconds (delta or HTTP date), or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(retry_after, attempt):
+    """Seconds before retrying: Retry-After when sent, else jittered exponential backoff."""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, RETRY_BACKOFF)
+    backoff = RETRY_BACKOFF * (2 ** attempt)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def _capped(retry_after):
+    return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+
+def _should_retry(status_code, retry_after, attempt):
+    """Retry 429/5xx while attempts remain, unless the server asks us to wait longer than MAX_RETRY_AFTER."""
+    if status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+        return False
+    return retry_after is None or retry_after <= MAX_RETRY_AFTER
+
+
+def record_download(response, endpoint):
+    """Count the bytes received for a fully read response body (compressed size when compressed)."""
+    if isinstance(response, httpx.Response):
+        size = response.num_bytes_downloaded
+    else:
+        size = response.raw.tell() if response.raw is not None else len(response.content)
+    METRICS.count('upstream_bytes', size, endpoint=endpoint)
+
+
+def request(method, path, endpoint='api', **kwargs):
+    """Send a request through the shared session with the endpoint's timeouts.
+    
+    Streamed responses (stream=True) aren't read here, so callers pass them
+    to record_download() once they have consumed the body.
+    """
+    kwargs.setdefault('timeout', TIMEOUTS[endpoint])
+    url = url_for(path)
+    for attempt in range(MAX_RETRIES + 1):
+        LIMITER.acquire()
+        response = get_session().request(method, url, **kwargs)
+        retry_after = retry_after_seconds(response)
+        LIMITER.on_response(response.status_code, _capped(retry_after))
+        METRICS.count('upstream_requests', endpoint=endpoint, status=response.status_code)
+        if not _should_retry(response.status_code, retry_after, attempt):
+            if not kwargs.get('stream'):
+                record_download(response, endpoint)
+            return response
+        response.close()
+        time.sleep(retry_delay(retry_after, attempt))
+
+
+def get(path, endpoint='api', **kwargs):
+    return request("GET", path, endpoint=endpoint, **kwargs)
+
+
+def post(path, endpoint='api', **kwargs):
+    return request("POST", path, endpoint=endpoint, **kwargs)
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """Return the pooled AsyncClient for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        # httpx advertises every content encoding it can decode on its own;
+        # transport retries only cover failed connection attempts
+        transport = httpx.AsyncHTTPTransport(
+            retries=MAX_RETRIES,
+            limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+        )
+        client = _async_clients[loop] = httpx.AsyncClient(transport=transport)
+    return client
+
+
+async def close_async_client():
+    """Close the running event loop's pooled client, if it has one."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def request_async(method, path, endpoint='api', **kwargs):
+    """Async request() through the loop's pooled client, retrying 429/5xx with backoff."""
+    client = get_async_client()
+    connect, read = TIMEOUTS[endpoint]
+    kwargs.setdefault('timeout', httpx.Timeout(read, connect=connect))
+    request = client.build_request(method, url_for(path), **kwargs)
+    for attempt in range(MAX_RETRIES + 1):
+        await LIMITER.acquire_async()
+        response = await client.send(request)
+        retry_after = retry_after_seconds(response)
+        LIMITER.on_response(response.status_code, _capped(retry_after))
+        METRICS.count('upstream_requests', endpoint=endpoint, status=response.status_code)
+        if not _should_retry(response.status_code, retry_after, attempt):
+            record_download(response, endpoint)
+            return response
+        await response.aclose()
+        await asyncio.sleep(retry_delay(retry_after, attempt))
+
+
+async def get_async(path, endpoint='api', **kwargs):
+    return await request_async("GET", path, endpoint=endpoint, **kwargs)
+
+
+async def post_async(path, endpoint='api', **kwargs):
+    return await request_async("POST", path, endpoint=endpoint, **kwargs)
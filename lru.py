@@ -0,0 +1,36 @@
+"""
+Bounded per-account state.
+
+Caches keyed by account (sessions, calendars, set-log stores, custom
+exercises, ...) grow with every user the server has seen, so each keeps at
+most a fixed number of entries and drops the least recently used one first.
+Callers hold their own lock around it.
+"""
+
+from collections import OrderedDict
+
+
+class LRUDict(OrderedDict):
+    """OrderedDict of at most `maxsize` entries, least recently used first.
+
+    Setting a key marks it most recently used and evicts the oldest entries
+    past `maxsize`; touch() does the same for a read. Plain get() and `in`
+    don't change the order.
+    """
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+    def touch(self, key, default=None):
+        """Return the value for `key` (or `default`), marking it most recently used."""
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return super().__getitem__(key)
@@ -0,0 +1,192 @@
+"""
+In-process metrics for the hot paths.
+
+Timing spans record how often a step ran, how long it took and how often it
+failed (login, user lookup, upstream fetches, RSC parsing, rendering, whole
+tool calls). Counters track upstream requests, bytes downloaded and whether
+lookups were served from a local cache. Both are exposed by the server_stats
+tool and, over HTTP, as Prometheus text on /metrics.
+
+Set JEFIT_PROFILE_DIR to also write a cProfile dump of every tool call to
+that directory (one call is profiled at a time; overlapping calls are skipped).
+"""
+
+import cProfile
+import functools
+import inspect
+import itertools
+import os
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILE_DIR = os.getenv("JEFIT_PROFILE_DIR")
+
+# Upper bounds (seconds) of the span duration histogram buckets
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Span:
+    __slots__ = ('count', 'errors', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(SPAN_BUCKETS)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (name, sorted label items) -> value
+        self._counters = {}
+        self._spans = {}
+
+    def count(self, name, value=1, **labels):
+        """Add `value` to the counter `name` with the given labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, error=False):
+        """Record one run of the span `name`."""
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                span = self._spans[name] = _Span()
+            span.count += 1
+            span.errors += error
+            span.total += seconds
+            span.max = max(span.max, seconds)
+            for i, bound in enumerate(SPAN_BUCKETS):
+                if seconds <= bound:
+                    span.buckets[i] += 1
+                    break
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block (awaits included) as the span `name`."""
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, error)
+
+    def timed(self, name):
+        """Decorator timing every call of a function or coroutine function as the span `name`."""
+        def decorate(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+            else:
+                @functools.wraps(fn)
+                def wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        """Counters and span summaries as plain data."""
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                label_text = ",".join(f"{k}={v}" for k, v in labels)
+                counters[f"{name}{{{label_text}}}" if label_text else name] = value
+            spans = {
+                name: {
+                    'count': span.count,
+                    'errors': span.errors,
+                    'total_seconds': round(span.total, 3),
+                    'avg_ms': round(span.total / span.count * 1000, 2) if span.count else 0.0,
+                    'max_ms': round(span.max * 1000, 2),
+                }
+                for name, span in sorted(self._spans.items())
+            }
+        return {'counters': counters, 'spans': spans}
+
+    def prometheus(self, gauges=None):
+        """Prometheus text exposition of the counters, span histograms and extra `gauges` ({name: number})."""
+        lines = []
+        with self._lock:
+            counter_names = sorted({name for name, _ in self._counters})
+            for name in counter_names:
+                lines.append(f"# TYPE jefit_{name}_total counter")
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f"jefit_{name}_total{_labels(labels)} {value}")
+
+            if self._spans:
+                lines.append("# TYPE jefit_span_seconds histogram")
+            for name, span in sorted(self._spans.items()):
+                cumulative = 0
+                for bound, hits in zip(SPAN_BUCKETS, span.buckets):
+                    cumulative += hits
+                    lines.append(f"jefit_span_seconds_bucket{_labels((('span', name), ('le', f'{bound:g}')))} {cumulative}")
+                lines.append(f"jefit_span_seconds_bucket{_labels((('span', name), ('le', '+Inf')))} {span.count}")
+                lines.append(f"jefit_span_seconds_sum{_labels((('span', name),))} {span.total:.6f}")
+                lines.append(f"jefit_span_seconds_count{_labels((('span', name),))} {span.count}")
+            if self._spans:
+                lines.append("# TYPE jefit_span_errors_total counter")
+            for name, span in sorted(self._spans.items()):
+                lines.append(f"jefit_span_errors_total{_labels((('span', name),))} {span.errors}")
+
+        for name, value in sorted((gauges or {}).items()):
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE jefit_{name} gauge")
+                lines.append(f"jefit_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(items):
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+_profile_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+@asynccontextmanager
+async def profile(name):
+    """cProfile the enclosed block into PROFILE_DIR, if profiling is enabled and no other block is being profiled."""
+    if not PROFILE_DIR or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        path = Path(PROFILE_DIR) / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{next(_profile_ids)}.prof"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"✓ Profile written to {path}", file=sys.stderr)
+    finally:
+        _profile_lock.release()
+
+
+# Shared by every instrumented call site
+METRICS = Metrics()
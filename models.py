@@ -0,0 +1,105 @@
+"""
+Typed, compact representation of workout payloads for structured tool output.
+
+Days -> sessions -> exercises -> sets, as slotted dataclasses. Sets are
+emitted as `[weight, reps]` pairs, and exercise names, muscle groups and
+equipment once in a top-level `exercises` table instead of being repeated
+for every occurrence.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+@dataclass(slots=True)
+class WorkoutSet:
+    weight: float
+    reps: int
+
+    def to_list(self):
+        return [self.weight, self.reps]
+
+
+@dataclass(slots=True)
+class ExerciseLog:
+    exercise_id: str
+    sets: list[WorkoutSet]
+
+    @property
+    def volume(self):
+        return sum(s.weight * s.reps for s in self.sets)
+
+    def to_dict(self):
+        return {
+            'exercise_id': self.exercise_id,
+            'volume': self.volume,
+            'sets': [s.to_list() for s in self.sets],
+        }
+
+
+@dataclass(slots=True)
+class WorkoutSession:
+    started: str
+    duration_seconds: int
+    total_weight: float
+    exercises: list[ExerciseLog]
+
+    def to_dict(self):
+        return {
+            'started': self.started,
+            'duration_seconds': self.duration_seconds,
+            'total_weight': self.total_weight,
+            'exercises': [e.to_dict() for e in self.exercises],
+        }
+
+
+@dataclass(slots=True)
+class WorkoutDay:
+    date: str
+    sessions: list[WorkoutSession] = field(default_factory=list)
+    error: str | None = None
+
+    def to_dict(self):
+        day = {'date': self.date, 'sessions': [s.to_dict() for s in self.sessions]}
+        if self.error is not None:
+            day['error'] = self.error
+        return day
+
+
+def parse_workout_day(date_str, workout_data):
+    """Build a WorkoutDay from a raw /sessions payload (or the exception raised fetching it)."""
+    if isinstance(workout_data, Exception):
+        return WorkoutDay(date_str, error=str(workout_data))
+    sessions = []
+    for session in workout_data.get('data') or []:
+        exercises = [
+            ExerciseLog(
+                log['exercise_id'],
+                [WorkoutSet(float(s.get('weight') or 0), int(s.get('reps') or 0)) for s in log['log_sets']]
+            )
+            for log in session['logs']
+        ]
+        sessions.append(WorkoutSession(
+            started=datetime.fromtimestamp(session['date']).isoformat(),
+            duration_seconds=session['total_time'],
+            total_weight=session['total_weight'],
+            exercises=exercises,
+        ))
+    return WorkoutDay(date_str, sessions)
+
+
+def workouts_payload(dates, results, exercise_db):
+    """Structured output for several dates: {"days": [...], "exercises": {id: {...}}}."""
+    days = [parse_workout_day(date_str, results[date_str]) for date_str in dates]
+    exercises = {}
+    for day in days:
+        for session in day.sessions:
+            for log in session.exercises:
+                if log.exercise_id not in exercises:
+                    exercise = exercise_db.get(log.exercise_id, {})
+                    exercises[log.exercise_id] = {
+                        'name': exercise.get('name', f'Unknown Exercise ({log.exercise_id})'),
+                        'body_parts': list(exercise.get('body_parts', [])),
+                        'equipment': list(exercise.get('equipment', [])),
+                    }
+    return {'days': [day.to_dict() for day in days], 'exercises': exercises}
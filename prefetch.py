@@ -0,0 +1,151 @@
+"""
+Optional background prefetching of workouts into the local caches.
+
+The worker runs its own event loop on a daemon thread. On a schedule it
+re-syncs the calendar of the account configured in .env and fetches its
+latest workouts, so "show my last workout" is answered from the warm session
+store without a login or an upstream request. Recent workouts whose cached
+copy would go stale before the next warm-up are fetched again ahead of time,
+so the interval has to stay below the session store's RECENT_TTL. When a tool browses a date or
+range, the workouts just before and after it are fetched too, as the user
+who browsed. All of this runs as bulk traffic under the shared rate limiter.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from contextvars import copy_context
+from dotenv import load_dotenv
+import http_client
+from auth import account_key
+from history import get_workout_dates, sync_calendar
+from rate_limit import bulk_priority
+from session_store import RECENT_TTL, STORE
+from workout_info import get_workouts_for_dates
+
+load_dotenv()
+
+PREFETCH_ENABLED = os.getenv("JEFIT_PREFETCH", "0").lower() in ("1", "true", "yes")
+# Seconds between scheduled warm-ups; below RECENT_TTL so recent workouts never go stale in between
+PREFETCH_INTERVAL = float(os.getenv("JEFIT_PREFETCH_INTERVAL", str(RECENT_TTL / 2)))
+# Most recent workouts kept warm
+PREFETCH_RECENT = int(os.getenv("JEFIT_PREFETCH_RECENT", "5"))
+# Workout dates prefetched on each side of a browsed date or range
+PREFETCH_ADJACENT = int(os.getenv("JEFIT_PREFETCH_ADJACENT", "2"))
+
+
+class PrefetchWorker:
+    def __init__(self, interval=PREFETCH_INTERVAL, recent=PREFETCH_RECENT, adjacent=PREFETCH_ADJACENT):
+        self.interval = interval
+        self.recent = recent
+        self.adjacent = adjacent
+        self._thread = None
+        self._loop = None
+        self._stopping = None
+        self.warmups = 0
+        self.prefetched = 0
+        self.errors = 0
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the worker thread (no-op if it is already running)."""
+        if self.is_running():
+            return
+        if self.interval >= RECENT_TTL:
+            print(f"⚠️  JEFIT_PREFETCH_INTERVAL ({self.interval:g}s) is not below JEFIT_RECENT_TTL ({RECENT_TTL}s); "
+                  f"recent workouts will go stale between warm-ups", file=sys.stderr)
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), name="workout-prefetch", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout=5):
+        """Ask the worker to stop and wait up to `timeout` seconds for it to finish."""
+        if not self.is_running():
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+
+    def hint(self, start_date, end_date=None):
+        """Prefetch the workouts around a date or range that was just browsed (no-op when stopped)."""
+        if not self.adjacent or not self.is_running():
+            return
+        # Run as the user who browsed, not the worker's default account
+        context = copy_context()
+        self._loop.call_soon_threadsafe(
+            lambda: self._loop.create_task(self._prefetch_adjacent(start_date, end_date or start_date), context=context)
+        )
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        self._stopping = asyncio.Event()
+        ready.set()
+        try:
+            self._loop.run_until_complete(self._schedule())
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(http_client.close_async_client())
+        finally:
+            self._loop.close()
+
+    async def _schedule(self):
+        while not self._stopping.is_set():
+            if account_key():
+                await self.warm()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fetch(self, dates, refresh=False):
+        with bulk_priority():
+            results = await get_workouts_for_dates(dates, refresh)
+        failed = sum(isinstance(result, Exception) for result in results.values())
+        self.prefetched += len(results) - failed
+        self.errors += failed
+
+    async def warm(self):
+        """Re-sync the calendar and fetch the latest workouts of the configured account.
+        
+        A workout is fetched again if its cached copy would go stale before the
+        next warm-up, so it stays servable from the session store until then.
+        """
+        try:
+            with bulk_priority():
+                await sync_calendar(force=True)
+                dates = await get_workout_dates()
+            if self.recent:
+                await self._fetch(STORE.expiring(account_key(), dates[-self.recent:], self.interval), refresh=True)
+            self.warmups += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️  Prefetch warm-up failed: {e}", file=sys.stderr)
+
+    async def _prefetch_adjacent(self, start_date, end_date):
+        try:
+            with bulk_priority():
+                dates = await get_workout_dates()
+            lo = bisect_left(dates, start_date)
+            hi = bisect_right(dates, end_date)
+            await self._fetch(dates[max(0, lo - self.adjacent):lo] + dates[hi:hi + self.adjacent])
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️  Prefetch around {start_date}..{end_date} failed: {e}", file=sys.stderr)
+
+    def stats(self):
+        return {
+            'running': self.is_running(),
+            'warmups': self.warmups,
+            'prefetched': self.prefetched,
+            'errors': self.errors,
+        }
+
+
+PREFETCHER = PrefetchWorker()
@@ -0,0 +1,199 @@
+"""
+Client-side rate limiting of every JEFit request.
+
+A single token bucket is shared by all users and both the blocking and the
+async HTTP paths. A 429 response pauses the bucket for the server's
+Retry-After and halves its rate, which then creeps back up with each
+successful response. Interactive calls (a single date, the calendar) can
+use the whole bucket; bulk traffic (batches, ranges, prefetching) leaves a
+reserve for them and yields while an interactive call is waiting.
+
+While several accounts are waiting for tokens they take turns: a request
+yields to any other account waiting at the same priority that was served
+less recently, so one user's year-long backfill gets a fair share of the
+bucket instead of all of it.
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from lru import LRUDict
+
+load_dotenv()
+
+# Sustained requests per second (0 disables limiting) and burst size
+RATE_LIMIT = float(os.getenv("JEFIT_RATE_LIMIT", "5"))
+RATE_BURST = max(1, int(os.getenv("JEFIT_RATE_BURST", "10")))
+# Tokens bulk requests must leave in the bucket for interactive ones
+BULK_RESERVE = int(os.getenv("JEFIT_RATE_BULK_RESERVE", str(max(1, RATE_BURST // 5))))
+
+# Lowest fraction of RATE_LIMIT that repeated 429s can throttle down to
+MIN_RATE_FRACTION = 0.1
+# Fraction of RATE_LIMIT recovered per successful response after a 429
+RECOVERY_STEP = 0.05
+
+# Accounts whose last turn is remembered for fair sharing
+MAX_TRACKED_ACCOUNTS = 1000
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+_priority = ContextVar("jefit_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_priority():
+    """Send the requests made in this context (and tasks started from it) as bulk traffic."""
+    token = _priority.set(BULK)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+def current_account():
+    """Key of the account the current request is sent for."""
+    # auth imports the HTTP client, which imports this module
+    from auth import account_key
+    return account_key()
+
+
+class TokenBucket:
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST, reserve=BULK_RESERVE):
+        self._lock = threading.Lock()
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.reserve = min(reserve, burst - 1)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._interactive_waiting = 0
+        # (account, priority) -> requests waiting; account -> serial of its last token, oldest first
+        self._waiters = {}
+        self._served = LRUDict(MAX_TRACKED_ACCOUNTS)
+        self._serials = itertools.count(1)
+        self.throttled = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _has_turn(self, account, priority):
+        """False while another account waits at `priority` and was served less recently."""
+        mine = self._served.get(account, 0)
+        return not any(
+            other != account and waiting_priority == priority and self._served.get(other, 0) < mine
+            for other, waiting_priority in self._waiters
+        )
+
+    def _try_take(self, priority, account):
+        """Take a token if `priority` may; otherwise return the seconds to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            needed = 1.0
+            if priority == BULK:
+                if self._interactive_waiting:
+                    return 1.0 / self.rate
+                needed += self.reserve
+            if not self._has_turn(account, priority):
+                return 1.0 / self.rate
+            if self._tokens >= needed:
+                self._tokens -= 1.0
+                self._served[account] = next(self._serials)
+                return 0.0
+            return (needed - self._tokens) / self.rate
+
+    def _waiting(self, priority, account, delta):
+        with self._lock:
+            if priority == INTERACTIVE:
+                self._interactive_waiting += delta
+            key = (account, priority)
+            waiting = self._waiters.get(key, 0) + delta
+            if waiting:
+                self._waiters[key] = waiting
+            else:
+                self._waiters.pop(key, None)
+
+    def _record_wait(self, started):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds += time.monotonic() - started
+
+    def acquire(self, priority=None, account=None):
+        """Block until a request may be sent."""
+        if not self.max_rate:
+            return
+        priority = priority or current_priority()
+        account = current_account() if account is None else account
+        delay = self._try_take(priority, account)
+        if not delay:
+            return
+        started = time.monotonic()
+        self._waiting(priority, account, 1)
+        try:
+            while delay:
+                time.sleep(delay)
+                delay = self._try_take(priority, account)
+        finally:
+            self._waiting(priority, account, -1)
+            self._record_wait(started)
+
+    async def acquire_async(self, priority=None, account=None):
+        """Wait, without blocking the event loop, until a request may be sent."""
+        if not self.max_rate:
+            return
+        priority = priority or current_priority()
+        account = current_account() if account is None else account
+        delay = self._try_take(priority, account)
+        if not delay:
+            return
+        started = time.monotonic()
+        self._waiting(priority, account, 1)
+        try:
+            while delay:
+                await asyncio.sleep(delay)
+                delay = self._try_take(priority, account)
+        finally:
+            self._waiting(priority, account, -1)
+            self._record_wait(started)
+
+    def on_response(self, status_code, retry_after=None):
+        """Adapt to the upstream's answer: back off on 429, recover gradually otherwise."""
+        if not self.max_rate:
+            return
+        with self._lock:
+            if status_code == 429:
+                self.throttled += 1
+                self.rate = max(self.max_rate * MIN_RATE_FRACTION, self.rate / 2)
+                self._tokens = min(self._tokens, 0.0)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            elif self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RECOVERY_STEP)
+
+    def stats(self):
+        return {
+            'rate': round(self.rate, 2),
+            'max_rate': self.max_rate,
+            'throttled': self.throttled,
+            'waits': self.waits,
+            'wait_seconds': round(self.wait_seconds, 3),
+            'waiting_accounts': len({account for account, _ in self._waiters}),
+        }
+
+
+# Shared by every JEFit request in the process
+LIMITER = TokenBucket()
@@ -0,0 +1,189 @@
+"""
+Markdown rendering of workout payloads shared by all workout tools.
+
+Per-exercise header fragments are built once per catalog and reused for every
+occurrence, and each day is written into a single list buffer. A character
+budget keeps large batches from overflowing the client's context: the newest
+days are rendered in full and older ones collapse into one-line summaries.
+"""
+
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Default response budget in characters (roughly 4 characters per token); 0 disables it
+MAX_RESPONSE_CHARS = int(os.getenv("JEFIT_MAX_RESPONSE_CHARS", "60000"))
+
+FORMATS = ("markdown", "table")
+
+DAY_SEPARATOR = "\n---\n\n"
+
+
+def _collapse_sets(log_sets):
+    """Collapse consecutive identical sets: `100×5 ×3, 110×3`."""
+    parts = []
+    previous = None
+    count = 0
+    for s in log_sets:
+        current = (s.get('weight', 0), s.get('reps', 0))
+        if current == previous:
+            count += 1
+            continue
+        if previous is not None:
+            parts.append(f"{previous[0]}×{previous[1]}" + (f" ×{count}" if count > 1 else ""))
+        previous = current
+        count = 1
+    if previous is not None:
+        parts.append(f"{previous[0]}×{previous[1]}" + (f" ×{count}" if count > 1 else ""))
+    return ", ".join(parts)
+
+
+def _summary_header(summarized, omitted):
+    counts = ", ".join(
+        f"{count} {label}" for count, label in ((summarized, "summarized"), (omitted, "omitted")) if count
+    )
+    return f"# Earlier workouts ({counts} to fit the response size limit)\n"
+
+
+def _omitted_line(omitted):
+    return f"- ...{omitted} older workouts omitted"
+
+
+class WorkoutRenderer:
+    """Renders workout payloads using one exercise catalog."""
+
+    def __init__(self, exercise_db):
+        self.exercise_db = exercise_db
+        self._headers = {}
+        self._rows = {}
+
+    def _exercise_fields(self, exercise_id):
+        exercise = self.exercise_db.get(exercise_id, {})
+        name = exercise.get('name', f'Unknown Exercise ({exercise_id})')
+        muscle_groups = ', '.join(exercise.get('body_parts', ['Unknown']))
+        equipment = ', '.join(exercise.get('equipment', ['Unknown']))
+        return name, muscle_groups, equipment
+
+    def exercise_header(self, exercise_id):
+        """Markdown lines following `### i. ` for an exercise, cached per exercise."""
+        header = self._headers.get(exercise_id)
+        if header is None:
+            name, muscle_groups, equipment = self._exercise_fields(exercise_id)
+            header = f"{name}\n- **Muscle Groups:** {muscle_groups}\n- **Equipment:** {equipment}\n\n"
+            self._headers[exercise_id] = header
+        return header
+
+    def exercise_row(self, exercise_id):
+        """Table cells for an exercise, cached per exercise."""
+        row = self._rows.get(exercise_id)
+        if row is None:
+            row = " | ".join(self._exercise_fields(exercise_id))
+            self._rows[exercise_id] = row
+        return row
+
+    def _session_summary(self, write, session):
+        session_date = datetime.fromtimestamp(session['date']).strftime('%Y-%m-%d %H:%M:%S')
+        total_time = session['total_time']
+        write(f"**Started:** {session_date}\n")
+        write(f"**Duration:** {total_time // 60}m {total_time % 60}s\n")
+        write(f"**Weight Lifted:** {session['total_weight']} lbs\n\n")
+
+    def render_day(self, date_str, workout_data, fmt="markdown"):
+        """Render one date's payload (or the exception raised fetching it)."""
+        out = []
+        write = out.append
+        write(f"# Workout for {date_str}\n\n")
+
+        if isinstance(workout_data, Exception):
+            write(f"Failed to fetch workout: {workout_data}\n\n")
+        elif 'data' not in workout_data or not workout_data['data']:
+            write("No workout found for this date.\n\n")
+        elif fmt == "table":
+            for session in workout_data['data']:
+                self._session_summary(write, session)
+                write("| # | Exercise | Muscle Groups | Equipment | Sets (lbs×reps) |\n")
+                write("|---|---|---|---|---|\n")
+                for i, log in enumerate(session['logs'], 1):
+                    write(f"| {i} | {self.exercise_row(log['exercise_id'])} | {_collapse_sets(log['log_sets'])} |\n")
+                write("\n")
+        else:
+            for session in workout_data['data']:
+                self._session_summary(write, session)
+                write("## Exercises\n\n")
+                for i, log in enumerate(session['logs'], 1):
+                    write(f"### {i}. ")
+                    write(self.exercise_header(log['exercise_id']))
+                    for j, s in enumerate(log['log_sets'], 1):
+                        write(f"  - Set {j}: {s.get('weight', 0)} lbs × {s.get('reps', 0)} reps\n")
+                    write("\n")  # Blank line between exercises
+
+        # Sections end with a blank line; the day itself ends with a single newline
+        return "".join(out)[:-1]
+
+    def summarize_day(self, date_str, workout_data):
+        """One-line summary used when a day doesn't fit in the response budget."""
+        if isinstance(workout_data, Exception):
+            return f"- **{date_str}:** failed to fetch ({workout_data})"
+        sessions = workout_data.get('data') or []
+        if not sessions:
+            return f"- **{date_str}:** no workout"
+        exercises = sum(len(session['logs']) for session in sessions)
+        sets = sum(len(log['log_sets']) for session in sessions for log in session['logs'])
+        weight = sum(session['total_weight'] for session in sessions)
+        return f"- **{date_str}:** {exercises} exercises, {sets} sets, {weight} lbs"
+
+    def render(self, dates, results, fmt="markdown", max_chars=MAX_RESPONSE_CHARS):
+        """Render several dates, newest first in full while the budget lasts.
+
+        Days that don't fit are summarized (oldest first in the output), and
+        summaries that don't fit either are counted as omitted.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+
+        full = []
+        summarized = []
+        used = 0
+        for index in range(len(dates) - 1, -1, -1):
+            date_str = dates[index]
+            if not max_chars or not summarized:
+                text = self.render_day(date_str, results[date_str], fmt)
+                if not max_chars or used + len(text) + len(DAY_SEPARATOR) <= max_chars or not full:
+                    full.append(text)
+                    used += len(text) + len(DAY_SEPARATOR)
+                    continue
+            summarized.append(date_str)
+
+        if not summarized:
+            return DAY_SEPARATOR.join(reversed(full))
+
+        # Reserve room for the longest header and omission line these counts can produce
+        total = len(summarized)
+        used += len(_summary_header(total, total)) + len(_omitted_line(total)) + 2
+        kept = []
+        for date_str in summarized:
+            line = self.summarize_day(date_str, results[date_str])
+            if used + len(line) + 1 > max_chars:
+                break
+            kept.append(line)
+            used += len(line) + 1
+        omitted = total - len(kept)
+        kept.reverse()
+        if omitted and kept:
+            kept.insert(0, _omitted_line(omitted))
+        summary = "\n".join([_summary_header(total - omitted, omitted)] + kept) + "\n"
+        return DAY_SEPARATOR.join([summary] + list(reversed(full)))
+
+
+
+_renderer = None
+
+
+def get_renderer(exercise_db):
+    """Renderer for `exercise_db`, reusing its cached fragments while the catalog is unchanged."""
+    global _renderer
+    if _renderer is None or _renderer.exercise_db is not exercise_db:
+        _renderer = WorkoutRenderer(exercise_db)
+    return _renderer
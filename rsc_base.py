@@ -1,88 +1,410 @@
-import requests
+import http_client
 import json
 import re
-from typing import Dict, Any, Optional, List
-class RSCParser:
-    """Generic parser for React Server Components streaming format"""
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Dict, Any, Optional, List, Callable, Iterable, Tuple, NamedTuple
+from metrics import METRICS
+
+# Row header like `1a:`, and the header of a length-prefixed text row like `T3f2,`
+_ROW_RE = re.compile(rb'([a-f0-9]+):')
+_TEXT_ROW_RE = re.compile(rb'T([a-f0-9]+),')
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Called with the chunk key (e.g. "$1a") and its raw bytes; return True to decode it
+ChunkPredicate = Callable[[str, bytes], bool]
+
+
+class RSCStreamParser:
+    """Incremental parser for the RSC wire format.
+
+    Bytes are fed as they arrive, so the full response never has to be held
+    in memory. Each complete row is offered to `want` first, and rows it
+    rejects are dropped without being decoded.
+    """
     
-    def parse_rsc_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse React Server Components streaming format into chunks"""
-        lines = response_text.strip().split('\n')
-        chunks = {}
-        
-        for line in lines:
-            if not line.strip():
+    def __init__(self, want: Optional[ChunkPredicate] = None):
+        self.chunks = {}
+        self.rows = 0
+        self.skipped = 0
+        self.bytes_read = 0
+        self._want = want
+        self._buf = bytearray()
+        self._pos = 0
+        self._text_row = None  # (key, byte length) while reading a T row
+    
+    def feed(self, data: bytes) -> None:
+        self.bytes_read += len(data)
+        self._buf += data
+        self._drain()
+        # Drop consumed bytes so the buffer only ever holds a partial row
+        if self._pos:
+            del self._buf[:self._pos]
+            self._pos = 0
+    
+    def close(self) -> Dict[str, Any]:
+        """Flush a trailing row without a newline and return the parsed chunks."""
+        if self._text_row is None and self._pos < len(self._buf):
+            self._line(bytes(self._buf[self._pos:]))
+        self._buf = bytearray()
+        self._pos = 0
+        return self.chunks
+    
+    def _drain(self) -> None:
+        buf = self._buf
+        while True:
+            if self._text_row is not None:
+                key, length = self._text_row
+                if len(buf) - self._pos < length:
+                    return
+                raw = bytes(buf[self._pos:self._pos + length])
+                self._pos += length
+                self._text_row = None
+                self._store(key, raw, is_text=True)
                 continue
-                
-            # Look for chunk patterns like: 123:{"data": "value"}
-            chunk_match = re.match(r'^([a-f0-9]+):(.*)', line)
-            if chunk_match:
-                chunk_id = chunk_match.group(1)
-                chunk_data = chunk_match.group(2)
-                
-                try:
-                    parsed_data = json.loads(chunk_data)
-                    chunks[f"${chunk_id}"] = parsed_data
-                except json.JSONDecodeError:
-                    chunks[f"${chunk_id}"] = chunk_data
-        
-        return chunks
+            
+            row = _ROW_RE.match(buf, self._pos)
+            if row:
+                text = _TEXT_ROW_RE.match(buf, row.end())
+                if text:
+                    self._text_row = (f"${row.group(1).decode()}", int(text.group(1), 16))
+                    self._pos = text.end()
+                    continue
+            
+            newline = buf.find(b'\n', self._pos)
+            if newline == -1:
+                return
+            if row and row.end() <= newline:
+                self._store(f"${row.group(1).decode()}", bytes(buf[row.end():newline]), is_text=False)
+            self._pos = newline + 1
     
-    def resolve_references(self, data: Any, chunks: Dict[str, Any]) -> Any:
-        """Recursively resolve $xxx references in the data structure"""
-        if isinstance(data, str) and data.startswith('$'):
-            if data in chunks:
-                resolved = chunks[data]
-                return self.resolve_references(resolved, chunks)
+    def _line(self, line: bytes) -> None:
+        row = _ROW_RE.match(line)
+        if row:
+            self._store(f"${row.group(1).decode()}", line[row.end():], is_text=False)
+    
+    def _store(self, key: str, raw: bytes, is_text: bool) -> None:
+        self.rows += 1
+        if self._want is not None and not self._want(key, raw):
+            self.skipped += 1
+            return
+        if is_text:
+            self.chunks[key] = raw.decode('utf-8', 'replace')
+            return
+        try:
+            self.chunks[key] = json.loads(raw)
+        except ValueError:
+            self.chunks[key] = raw.decode('utf-8', 'replace')
+
+
+# A chunk reference: `$1a`, lazy `$L1a` or promise `$@1a`, optionally followed by a `:key:key` path
+_REF_RE = re.compile(r'\$[L@]?([a-f0-9]+)((?::[^:]+)*)')
+
+# Special values that aren't references
+_SPECIAL_VALUES = {
+    '$undefined': None,
+    '$NaN': float('nan'),
+    '$Infinity': float('inf'),
+    '$-Infinity': float('-inf'),
+    '$-0': -0.0,
+}
+
+_MISSING = object()
+
+
+def decode_rsc_string(value: str) -> Tuple[Optional[str], Any]:
+    """Classify an RSC model string.
+    
+    Returns (chunk key, path) for a reference, or (None, value) with escapes
+    (`$$`, `$D`, `$n`, `$undefined`, ...) decoded for anything else.
+    """
+    if not value.startswith('$') or value == '$':
+        return None, value
+    if value.startswith('$$'):
+        return None, value[1:]
+    ref = _REF_RE.fullmatch(value)
+    if ref:
+        path = ref.group(2)
+        return f"${ref.group(1)}", path[1:].split(':') if path else []
+    special = _SPECIAL_VALUES.get(value, _MISSING)
+    if special is not _MISSING:
+        return None, special
+    if value.startswith('$D'):
+        return None, value[2:]
+    if value.startswith('$n'):
+        try:
+            return None, int(value[2:])
+        except ValueError:
+            return None, value
+    return None, value
+
+
+class RSCResolver:
+    """Resolves chunk references for one parsed response.
+    
+    Each chunk is resolved at most once and shared by every reference to it,
+    so shared components cost linear rather than quadratic work. A reference
+    back into a chunk that is still being resolved is left as the original
+    reference string (`$id` or `$id:path`) instead of recursing forever. `view()` resolves lazily on access.
+    """
+    
+    def __init__(self, chunks: Dict[str, Any]):
+        self.chunks = chunks
+        self._resolved: Dict[str, Any] = {}
+        self._resolving = set()
+    
+    def _follow(self, value: Any, path: List[str]) -> Any:
+        for key in path:
+            if isinstance(value, Mapping):
+                value = value.get(key)
+            elif isinstance(value, Sequence) and not isinstance(value, str) and key.isdigit() and int(key) < len(value):
+                value = value[int(key)]
             else:
+                return None
+        return value
+    
+    def resolve_chunk(self, key: str) -> Any:
+        """Fully resolve a chunk by key (e.g. "$1a"), memoized."""
+        if key in self._resolved:
+            return self._resolved[key]
+        if key in self._resolving:
+            return key  # cycle: leave the reference unresolved
+        self._resolving.add(key)
+        try:
+            resolved = self.resolve(self.chunks[key])
+        finally:
+            self._resolving.discard(key)
+        self._resolved[key] = resolved
+        return resolved
+    
+    def resolve(self, data: Any) -> Any:
+        """Return `data` with every reference replaced by its resolved chunk."""
+        if isinstance(data, str):
+            key, value = decode_rsc_string(data)
+            if key is None:
+                return value
+            if key not in self.chunks:
                 return data
-        
+            if key in self._resolving:
+                return data  # cycle: leave the reference (and its path) unresolved
+            return self._follow(self.resolve_chunk(key), value)
         elif isinstance(data, list):
-            return [self.resolve_references(item, chunks) for item in data]
-        
+            return [self.resolve(item) for item in data]
         elif isinstance(data, dict):
-            return {key: self.resolve_references(value, chunks) for key, value in data.items()}
-        
+            return {key: self.resolve(value) for key, value in data.items()}
         else:
             return data
     
+    def view(self, data: Any) -> Any:
+        """Lazily resolved view of `data`: containers are wrapped, references followed on access."""
+        seen = set()
+        while isinstance(data, str):
+            key, path = decode_rsc_string(data)
+            if key is None:
+                return path
+            if key not in self.chunks or key in seen:
+                return data
+            seen.add(key)
+            data = self.chunks[key]
+            if path:
+                # Views resolve each step, so the result is already a view or plain value
+                return self._follow(RSCView.wrap(self, data), path)
+        return RSCView.wrap(self, data)
+
+
+class RSCView:
+    """Base for read-only lazy views over raw chunk data."""
+    
+    @staticmethod
+    def wrap(resolver: RSCResolver, data: Any) -> Any:
+        if isinstance(data, dict):
+            return RSCDictView(resolver, data)
+        if isinstance(data, list):
+            return RSCListView(resolver, data)
+        return data
+
+
+class RSCDictView(RSCView, Mapping):
+    def __init__(self, resolver: RSCResolver, data: Dict[str, Any]):
+        self._resolver = resolver
+        self._data = data
+    
+    def __getitem__(self, key):
+        return self._resolver.view(self._data[key])
+    
+    def __iter__(self):
+        return iter(self._data)
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def to_python(self) -> Dict[str, Any]:
+        return self._resolver.resolve(self._data)
+
+
+class RSCListView(RSCView, Sequence):
+    def __init__(self, resolver: RSCResolver, data: List[Any]):
+        self._resolver = resolver
+        self._data = data
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._resolver.view(item) for item in self._data[index]]
+        return self._resolver.view(self._data[index])
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def to_python(self) -> List[Any]:
+        return self._resolver.resolve(self._data)
+
+
+class RSCParser:
+    """Generic parser for React Server Components streaming format"""
+    
+    def __init__(self):
+        self._predicates: List[ChunkPredicate] = []
+        self._resolver: Optional[RSCResolver] = None
+    
+    def register_predicate(self, predicate: ChunkPredicate) -> None:
+        """Only decode chunks accepted by at least one registered predicate."""
+        self._predicates.append(predicate)
+    
+    def _want(self, extra: Optional[ChunkPredicate] = None) -> Optional[ChunkPredicate]:
+        predicates = self._predicates + ([extra] if extra else [])
+        if not predicates:
+            return None
+        return lambda key, raw: any(p(key, raw) for p in predicates)
+    
+    @METRICS.timed("parse_rsc")
+    def parse_rsc_stream(self, data: Iterable[bytes], want: Optional[ChunkPredicate] = None) -> Dict[str, Any]:
+        """Parse RSC rows from an iterable of byte blocks (e.g. response.iter_content())"""
+        parser = RSCStreamParser(self._want(want))
+        for block in data:
+            parser.feed(block)
+        return parser.close()
+    
+    def parse_rsc_response(self, response_text: str, want: Optional[ChunkPredicate] = None) -> Dict[str, Any]:
+        """Parse React Server Components streaming format into chunks"""
+        return self.parse_rsc_stream([response_text.encode()], want)
+    
+    def resolve_references(self, data: Any, chunks: Dict[str, Any]) -> Any:
+        """Resolve $xxx references in the data structure (memoized and cycle-safe)"""
+        if self._resolver is None or self._resolver.chunks is not chunks:
+            self._resolver = RSCResolver(chunks)
+        return self._resolver.resolve(data)
+    
     def fetch_rsc_data(self, url: str, headers: Dict[str, str]) -> Optional[str]:
         """Fetch RSC data from URL"""
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = http_client.get(url, endpoint='rsc', headers=headers)
             response.raise_for_status()
             return response.text
         except Exception as e:
-            print(f"❌ Error fetching {url}: {str(e)}")
+            print(f"❌ Error fetching {url}: {str(e)}", file=sys.stderr)
+            return None
+    
+    def fetch_rsc_chunks(self, url: str, headers: Dict[str, str], want: Optional[ChunkPredicate] = None) -> Optional[Dict[str, Any]]:
+        """Fetch and parse RSC data from URL as it streams in"""
+        try:
+            with http_client.get(url, endpoint='rsc', headers=headers, stream=True) as response:
+                response.raise_for_status()
+                chunks = self.parse_rsc_stream(response.iter_content(STREAM_BLOCK_SIZE), want)
+                http_client.record_download(response, 'rsc')
+                return chunks
+        except Exception as e:
+            print(f"❌ Error fetching {url}: {str(e)}", file=sys.stderr)
             return None
     
     def analyze_rsc_content(self, chunks: Dict[str, Any], content_type: str, field_patterns: List[str]) -> List[Dict[str, Any]]:
         """Analyze RSC chunks to find content matching specific field patterns"""
-        content_objects = []
+        extractor = RSCExtractor()
+        # Don't search deeper once we find a match
+        extractor.add_shape(content_type, lambda obj: any(field in obj for field in field_patterns), descend=False)
+        return extractor.extract(chunks)[content_type]
+
+
+class Shape(NamedTuple):
+    """A kind of object to collect while walking parsed RSC data."""
+    name: str
+    matches: Callable[[Dict[str, Any]], bool]
+    # Raw-bytes hint used to skip decoding chunks that can't contain this shape
+    marker: Optional[bytes] = None
+    # Whether to keep walking inside a matched object
+    descend: bool = True
+
+
+def is_exercise_definition(obj: Dict[str, Any]) -> bool:
+    return 'id' in obj and 'name' in obj and 'body_parts' in obj
+
+
+def is_workout_session(obj: Dict[str, Any]) -> bool:
+    return 'logs' in obj and 'total_time' in obj
+
+
+def is_log_set(obj: Dict[str, Any]) -> bool:
+    return 'weight' in obj and 'reps' in obj
+
+
+EXERCISE_SHAPE = Shape('exercise', is_exercise_definition, marker=b'"body_parts"')
+SESSION_SHAPE = Shape('session', is_workout_session, marker=b'"total_time"')
+LOG_SET_SHAPE = Shape('log_set', is_log_set, marker=b'"reps"')
+
+
+class RSCExtractor:
+    """Collects objects of several shapes from parsed chunks in a single pass.
+    
+    The walk is iterative (no recursion or depth limit), visits every dict
+    and list once even if it is shared, and evaluates all registered shapes
+    against each dict.
+    """
+    
+    def __init__(self, shapes: Iterable[Shape] = ()):
+        self.shapes: List[Shape] = list(shapes)
+    
+    def add_shape(self, name: str, matches: Callable[[Dict[str, Any]], bool],
+                  marker: Optional[bytes] = None, descend: bool = True) -> None:
+        self.shapes.append(Shape(name, matches, marker, descend))
+    
+    def chunk_predicate(self) -> Optional[ChunkPredicate]:
+        """Stream predicate decoding only chunks that may contain a registered shape."""
+        if not self.shapes or any(shape.marker is None for shape in self.shapes):
+            return None
+        markers = [shape.marker for shape in self.shapes]
+        return lambda key, raw: any(marker in raw for marker in markers)
+    
+    def extract(self, chunks: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+        """Return matched objects grouped by shape name, in document order."""
+        shapes = self.shapes
+        groups = {shape.name: [] for shape in shapes}
+        seen = set()
+        stack = [data for data in reversed(list(chunks.values())) if isinstance(data, (dict, list))]
+        push = stack.append
+        pop = stack.pop
         
-        def search_nested(obj, depth=0):
-            """Recursively search for content in nested structures"""
-            if depth > 10:  # Prevent infinite recursion
-                return
-                
-            if isinstance(obj, dict):
-                # Check if this object matches our field patterns
-                if any(field in obj for field in field_patterns):
-                    content_objects.append(obj)
-                    return  # Don't search deeper once we find a match
-                
-                # Continue searching deeper
-                for value in obj.values():
-                    if isinstance(value, (dict, list)):
-                        search_nested(value, depth + 1)
+        while stack:
+            obj = pop()
+            obj_id = id(obj)
+            if obj_id in seen:
+                continue
+            seen.add(obj_id)
             
-            elif isinstance(obj, list):
-                for item in obj:
-                    if isinstance(item, (dict, list)):
-                        search_nested(item, depth + 1)
-        
-        # Search through all chunks
-        for chunk_data in chunks.values():
-            search_nested(chunk_data)
+            if type(obj) is dict:
+                descend = True
+                for shape in shapes:
+                    if shape.matches(obj):
+                        groups[shape.name].append(obj)
+                        descend = descend and shape.descend
+                if not descend:
+                    continue
+                children = obj.values()
+            else:
+                children = obj
+            
+            # Push in reverse so children are visited in document order
+            for child in reversed(children):
+                if type(child) is dict or type(child) is list:
+                    push(child)
         
-        return content_objects
+        return groups
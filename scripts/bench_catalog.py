@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Compare load time, lookup time and RSS of the legacy JSON exercise cache
+against the compact SQLite catalog.
+
+Each format is measured in a fresh subprocess so RSS numbers aren't skewed by
+the other run. Uses a synthetic catalog unless --json points at a real
+exercises_db.json.
+
+    uv run python scripts/bench_catalog.py [--json data/exercises_db.json] [--count 3000]
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_db import write_catalog  # noqa: E402
+
+BODY_PARTS = ['chest', 'back', 'shoulders', 'biceps', 'triceps', 'forearms', 'abs',
+              'glutes', 'quadriceps', 'hamstrings', 'calves', 'upper legs', 'lower legs']
+EQUIPMENT = ['barbell', 'dumbbell', 'machine', 'cable', 'bodyweight', 'kettlebell', 'band', 'smith machine']
+
+MEASURE = r'''
+import json, resource, sqlite3, sys, time
+sys.path.insert(0, {root!r})
+import catalog_db
+
+def rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+fmt, path, ids = sys.argv[1], sys.argv[2], json.loads(sys.argv[3])
+rss_before = rss_kb()
+t = time.perf_counter()
+if fmt == 'json':
+    with open(path) as f:
+        db = json.load(f)
+else:
+    db = catalog_db.CatalogDB(path)
+load = time.perf_counter() - t
+t = time.perf_counter()
+for exercise_id in ids:
+    db.get(exercise_id, {{}}).get('name')
+lookup = time.perf_counter() - t
+rss_after = rss_kb()
+print(json.dumps({{'load_ms': load * 1000, 'lookup_us': lookup / len(ids) * 1e6, 'rss_kb': rss_after - rss_before}}))
+'''
+
+
+def synthetic_catalog(count):
+    rng = random.Random(42)
+    exercises = {}
+    for i in range(count):
+        exercise_id = f"d_{i}" if i % 10 else f"u_{i}"
+        exercises[exercise_id] = {
+            'id': exercise_id,
+            'name': f"Exercise {i} " + rng.choice(['Press', 'Row', 'Curl', 'Squat', 'Fly', 'Raise']),
+            'body_parts': rng.sample(BODY_PARTS, rng.randint(1, 3)),
+            'equipment': rng.sample(EQUIPMENT, rng.randint(1, 2)),
+            'input_format': rng.randint(0, 3),
+            'popularity': rng.randint(0, 100000),
+        }
+    return exercises
+
+
+def measure(fmt, path, ids):
+    code = MEASURE.format(root=str(Path(__file__).resolve().parent.parent))
+    out = subprocess.run([sys.executable, "-c", code, fmt, str(path), json.dumps(ids)],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--json', type=Path, help="existing exercises_db.json to benchmark")
+    parser.add_argument('--count', type=int, default=3000, help="synthetic catalog size")
+    parser.add_argument('--lookups', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.json:
+            with open(args.json) as f:
+                exercises = json.load(f)
+            json_path = args.json
+        else:
+            exercises = synthetic_catalog(args.count)
+            json_path = tmp / 'exercises_db.json'
+            with open(json_path, 'w') as f:
+                json.dump(exercises, f, indent=2)
+
+        db_path = tmp / 'exercises.sqlite'
+        write_catalog(exercises, db_path)
+
+        rng = random.Random(0)
+        all_ids = list(exercises)
+        ids = [rng.choice(all_ids) for _ in range(args.lookups)]
+
+        print(f"Exercises: {len(exercises)}")
+        print(f"{'format':<8} {'size KB':>9} {'load ms':>9} {'lookup µs':>10} {'RSS +KB':>9}")
+        for fmt, path in (('json', json_path), ('sqlite', db_path)):
+            result = measure(fmt, path, ids)
+            print(f"{fmt:<8} {path.stat().st_size / 1024:>9.0f} {result['load_ms']:>9.2f} "
+                  f"{result['lookup_us']:>10.2f} {result['rss_kb']:>9}")
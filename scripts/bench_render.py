@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark workout rendering over a synthetic dataset: the original per-tool
+rendering loop against the shared renderer in markdown, table and budgeted
+modes.
+
+    uv run python scripts/bench_render.py [--sessions 1000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from render import WorkoutRenderer  # noqa: E402
+
+
+def synthetic_dataset(sessions, exercises=300, seed=7):
+    """Return (dates, results, exercise_db) with one session per day."""
+    rng = random.Random(seed)
+    exercise_db = {
+        f"d_{i}": {
+            'id': f"d_{i}", 'name': f"Exercise {i}",
+            'body_parts': rng.sample(['chest', 'back', 'shoulders', 'biceps', 'triceps', 'abs', 'quadriceps'], 2),
+            'equipment': [rng.choice(['barbell', 'dumbbell', 'machine', 'cable'])],
+        } for i in range(exercises)
+    }
+    ids = list(exercise_db)
+    start = date(2022, 1, 1)
+    dates = []
+    results = {}
+    for n in range(sessions):
+        day = start + timedelta(days=n)
+        logs = []
+        for exercise_id in rng.sample(ids, rng.randint(4, 8)):
+            weight = rng.choice([45, 95, 135, 185, 225])
+            logs.append({'exercise_id': exercise_id,
+                         'log_sets': [{'weight': weight, 'reps': rng.choice([5, 8, 10])} for _ in range(rng.randint(3, 5))]})
+        timestamp = int(datetime(day.year, day.month, day.day, 7).timestamp())
+        results[day.isoformat()] = {'data': [{'date': timestamp, 'total_time': rng.randint(1800, 5400),
+                                              'total_weight': rng.randint(5000, 30000), 'logs': logs}]}
+        dates.append(day.isoformat())
+    return dates, results, exercise_db
+
+
+def legacy_render(dates, results, exercise_db):
+    """The rendering loop as it was duplicated in get_batch_workouts, kept for comparison."""
+    all_workouts = []
+    for date_str in dates:
+        workout_data = results[date_str]
+        output_lines = [f"# Workout for {date_str}\n"]
+        for session in workout_data['data']:
+            session_date = datetime.fromtimestamp(session['date']).strftime('%Y-%m-%d %H:%M:%S')
+            output_lines.append(f"**Started:** {session_date}")
+            output_lines.append(f"**Duration:** {session['total_time'] // 60}m {session['total_time'] % 60}s")
+            output_lines.append(f"**Weight Lifted:** {session['total_weight']} lbs\n")
+            output_lines.append("## Exercises\n")
+            for i, log in enumerate(session['logs'], 1):
+                exercise_id = log['exercise_id']
+                exercise = exercise_db.get(exercise_id, {})
+                name = exercise.get('name', f'Unknown Exercise ({exercise_id})')
+                muscle_groups = ', '.join(exercise.get('body_parts', ['Unknown']))
+                equipment = ', '.join(exercise.get('equipment', ['Unknown']))
+                output_lines.append(f"### {i}. {name}")
+                output_lines.append(f"- **Muscle Groups:** {muscle_groups}")
+                output_lines.append(f"- **Equipment:** {equipment}")
+                output_lines.append("")
+                for j, s in enumerate(log['log_sets'], 1):
+                    output_lines.append(f"  - Set {j}: {s.get('weight', 0)} lbs × {s.get('reps', 0)} reps")
+                output_lines.append("")
+        all_workouts.append("\n".join(output_lines))
+    return "\n---\n\n".join(all_workouts)
+
+
+def measure(label, fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<30} {best * 1000:>9.1f} ms {len(text) / 1024:>10.0f} KB")
+    return text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=1000)
+    parser.add_argument('--budget', type=int, default=60000)
+    args = parser.parse_args()
+
+    dates, results, exercise_db = synthetic_dataset(args.sessions)
+    print(f"Sessions: {len(dates)}")
+
+    legacy = measure("legacy loop", lambda: legacy_render(dates, results, exercise_db))
+    markdown = measure("renderer markdown", lambda: WorkoutRenderer(exercise_db).render(dates, results, max_chars=0))
+    if markdown != legacy:
+        print("⚠️  renderer markdown output differs from the legacy loop")
+    measure("renderer table", lambda: WorkoutRenderer(exercise_db).render(dates, results, "table", max_chars=0))
+    measure(f"renderer markdown, {args.budget} chars",
+            lambda: WorkoutRenderer(exercise_db).render(dates, results, max_chars=args.budget))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark RSC parsing of the history page: the original split-lines parser
+against the streaming parser, with and without a chunk predicate.
+
+Uses a recorded response if --fixture is given, otherwise a synthetic page of
+roughly --size-mb megabytes. Record a real fixture with --record (needs
+JEFIT_USERNAME/JEFIT_PASSWORD).
+
+    uv run python scripts/bench_rsc.py [--fixture history.rsc] [--record history.rsc]
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rsc_base import RSCParser  # noqa: E402
+
+
+def legacy_parse(response_text):
+    """The parser as it was before streaming support, kept for comparison."""
+    lines = response_text.strip().split('\n')
+    chunks = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        chunk_match = re.match(r'^([a-f0-9]+):(.*)', line)
+        if chunk_match:
+            try:
+                chunks[f"${chunk_match.group(1)}"] = json.loads(chunk_match.group(2))
+            except json.JSONDecodeError:
+                chunks[f"${chunk_match.group(1)}"] = chunk_match.group(2)
+    return chunks
+
+
+def synthetic_page(size_mb, seed=42):
+    """Build an RSC payload mixing exercise definitions with large unrelated chunks."""
+    rng = random.Random(seed)
+    rows = ['0:["$","html",null,{"children":"$L1"}]', '1:I["app/layout.js",["static/chunks/app.js"],"default"]']
+    chunk_id = 2
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        if chunk_id % 4 == 0:
+            exercises = [{
+                'id': f"d_{chunk_id}_{i}", 'name': f"Exercise {chunk_id}-{i}",
+                'body_parts': rng.sample(['chest', 'back', 'biceps', 'triceps', 'abs'], 2),
+                'equipment': [rng.choice(['barbell', 'dumbbell', 'machine'])],
+                'input_format': 0, 'popularity': rng.randint(0, 1000),
+            } for i in range(20)]
+            row = f"{chunk_id:x}:" + json.dumps(["$", "div", None, {"exercises": exercises}])
+        else:
+            logs = [{'date': rng.randint(1.6e9, 1.7e9), 'weight': rng.random() * 200,
+                     'markup': "x" * rng.randint(50, 400)} for _ in range(60)]
+            row = f"{chunk_id:x}:" + json.dumps(["$", "section", None, {"logs": logs}])
+        rows.append(row)
+        size += len(row)
+        chunk_id += 1
+    return "\n".join(rows) + "\n"
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {elapsed * 1000:>9.1f} ms {peak / 1024 / 1024:>9.1f} MB {len(result):>8} chunks")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixture', type=Path, help="recorded RSC response to parse")
+    parser.add_argument('--record', type=Path, help="fetch the live history page and save it here first")
+    parser.add_argument('--size-mb', type=float, default=8)
+    args = parser.parse_args()
+
+    if args.record:
+        from auth import get_credentials
+        access_token, _ = get_credentials()
+        text = RSCParser().fetch_rsc_data("/my-jefit/progress/history",
+                                          {'rsc': '1', 'Cookie': f'jefitAccessToken={access_token}'})
+        if text is None:
+            sys.exit(1)
+        args.record.write_text(text)
+        args.fixture = args.record
+
+    if args.fixture:
+        payload = args.fixture.read_bytes()
+    else:
+        payload = synthetic_page(args.size_mb).encode()
+    print(f"Payload: {len(payload) / 1024 / 1024:.1f} MB")
+
+    rsc = RSCParser()
+    blocks = [payload[i:i + 64 * 1024] for i in range(0, len(payload), 64 * 1024)]
+    wants_exercises = lambda key, raw: b'"body_parts"' in raw  # noqa: E731
+
+    # The legacy path also had to hold the fully decoded response text
+    measure("legacy (text + split)", lambda: legacy_parse(payload.decode()))
+    measure("streaming, decode all", lambda: rsc.parse_rsc_stream(iter(blocks)))
+    measure("streaming, exercise chunks only", lambda: rsc.parse_rsc_stream(iter(blocks), want=wants_exercises))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the MCP tools, run offline against the fake JEFit API
+(scripts/fake_jefit.py) started in-process.
+
+Tools are called through an in-memory MCP client, cold (local caches emptied
+before every call) and warm. Each case reports p50/p99 latency, upstream
+requests per call and the peak memory traced during one extra call.
+
+Write results with --json, and fail CI on regressions with --baseline: the
+run exits with status 1 when a case's p50 is slower than the baseline's by
+more than --tolerance, or when it makes more upstream requests.
+
+    uv run python scripts/benchmark.py [--iterations 5] [--latency 0.005] [--json out.json] [--baseline base.json]
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+sys.path.insert(0, str(ROOT))
+
+from fake_jefit import FakeJEFit  # noqa: E402
+
+BATCH_SIZES = (10, 100, 1000)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+async def call(fn):
+    result = fn()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def run_case(fake, name, fn, setup=None, iterations=5):
+    """Time `fn` (after an untimed `setup`) `iterations` times, then once more under tracemalloc."""
+    samples = []
+    fake.reset_stats()
+    for _ in range(iterations):
+        if setup:
+            await call(setup)
+        started = time.perf_counter()
+        await call(fn)
+        samples.append(time.perf_counter() - started)
+    requests = fake.stats()['total_requests']
+
+    if setup:
+        await call(setup)
+    tracemalloc.start()
+    await call(fn)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        'case': name,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'requests_per_call': round(requests / iterations, 2),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+    }
+    print(f"{name:<34} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} "
+          f"{result['requests_per_call']:>9.1f} {result['peak_mb']:>9.2f}")
+    return result
+
+
+async def run_suite(fake, iterations):
+    from fastmcp import Client
+    import server
+    from auth import SESSION, account_key
+    from calendar_index import CALENDAR
+    from catalog_db import CATALOG_PATH
+    from rsc_base import RSCParser
+    from session_store import STORE
+    from workout_info import load_exercise_db
+
+    # Log in and let the startup catalog load finish so no case is charged for them
+    SESSION.get_credentials()
+    server.EXERCISE_CATALOG.get_db(timeout=60)
+    account = account_key()
+    dates = [entry['date'] for entry in fake.calendar]
+    page = fake.history_page().decode()
+
+    def remove_catalog():
+        CATALOG_PATH.unlink(missing_ok=True)
+
+    print(f"{'case':<34} {'p50 ms':>10} {'p99 ms':>10} {'requests':>9} {'peak MB':>9}")
+    results = [
+        await run_case(fake, "load_exercise_db (cold)", load_exercise_db, remove_catalog, iterations),
+        await run_case(fake, "load_exercise_db (warm)", load_exercise_db, None, iterations),
+        await run_case(fake, "parse_rsc_response", lambda: RSCParser().parse_rsc_response(page), None, iterations),
+    ]
+
+    async with Client(server.mcp) as client:
+        async def tool(name, **arguments):
+            return await client.call_tool(name, arguments)
+
+        list_dates = lambda: tool("list_workout_dates", start_date=dates[0], end_date=dates[-1])  # noqa: E731
+        results.append(await run_case(fake, "list_workout_dates (cold)", list_dates,
+                                      lambda: CALENDAR.expire(account), iterations))
+        results.append(await run_case(fake, "list_workout_dates (warm)", list_dates, None, iterations))
+
+        latest = dates[-1]
+        workout_info = lambda: tool("get_workout_info", date=latest)  # noqa: E731
+        results.append(await run_case(fake, "get_workout_info (cold)", workout_info,
+                                      lambda: STORE.invalidate(account, [latest]), iterations))
+        results.append(await run_case(fake, "get_workout_info (warm)", workout_info, None, iterations))
+
+        for size in BATCH_SIZES:
+            if size > len(dates):
+                continue
+            batch = dates[-size:]
+            batch_workouts = lambda: tool("get_batch_workouts", dates=batch)  # noqa: E731
+            results.append(await run_case(fake, f"get_batch_workouts {size} (cold)", batch_workouts,
+                                          lambda: STORE.invalidate(account, batch), iterations))
+            results.append(await run_case(fake, f"get_batch_workouts {size} (warm)", batch_workouts,
+                                          None, iterations))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for cases slower or chattier than the baseline."""
+    previous = {case['case']: case for case in baseline}
+    regressions = []
+    for case in results:
+        before = previous.get(case['case'])
+        if before is None:
+            continue
+        if case['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{case['case']}: p50 {before['p50_ms']} -> {case['p50_ms']} ms")
+        if case['requests_per_call'] > before['requests_per_call']:
+            regressions.append(
+                f"{case['case']}: requests/call {before['requests_per_call']} -> {case['requests_per_call']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.005, help="fake upstream latency in seconds")
+    parser.add_argument('--days', type=int, default=max(BATCH_SIZES), help="workout days served by the fake API")
+    parser.add_argument('--exercises', type=int, default=2000, help="exercises in the fake catalog")
+    parser.add_argument('--rate-limit', default="0", help="JEFIT_RATE_LIMIT for the run (0 disables it)")
+    parser.add_argument('--json', type=Path, help="write results to this file")
+    parser.add_argument('--baseline', type=Path, help="compare against results written by an earlier run")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed p50 slowdown vs the baseline")
+    args = parser.parse_args()
+
+    fake = FakeJEFit(days=args.days, exercises=args.exercises, latency=args.latency)
+    workdir = tempfile.mkdtemp(prefix="jefit-bench-")
+    os.chdir(workdir)
+    os.environ.update({
+        'JEFIT_BASE_URL': fake.start(),
+        'JEFIT_USERNAME': "benchmark",
+        'JEFIT_PASSWORD': "benchmark",
+        'JEFIT_SESSION_DB': str(Path(workdir) / "sessions.sqlite"),
+        'JEFIT_RATE_LIMIT': args.rate_limit,
+    })
+
+    results = asyncio.run(run_suite(fake, args.iterations))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for message in regressions:
+            print(f"❌ Regression: {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✓ No regressions against the baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the JEFit API, for benchmarks and offline runs.
+
+Serves login, /user, the sessions calendar, per-date sessions and the RSC
+history page from synthetic data (or recorded fixtures), with configurable
+latency and injected 503/429 errors. The history page carries an ETag and
+honours If-None-Match. Point the server at it with
+JEFIT_BASE_URL; any username and password are accepted.
+
+    uv run python scripts/fake_jefit.py [--port 8899] [--days 1000] [--latency 0.05] [--error-rate 0.01]
+    JEFIT_BASE_URL=http://127.0.0.1:8899 JEFIT_USERNAME=demo JEFIT_PASSWORD=demo uv run python server.py
+
+Fixtures recorded from the real API can replace the synthetic data: a
+directory with any of calendar.json (the calendar "data" list),
+sessions.json ({date: sessions payload}) and history.rsc (the raw page).
+Request counts and bytes sent are available as JSON from /__stats.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_render import synthetic_dataset  # noqa: E402
+
+USER_ID = 1
+
+
+def fake_token(ttl=3600):
+    """An unsigned JWT-shaped token whose `exp` the client can read."""
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip('=')
+    return f"{encode({'alg': 'none'})}.{encode({'exp': int(time.time()) + ttl, 'sub': USER_ID})}.fake"
+
+
+def history_page(exercise_db, filler_mb=1.0, seed=42):
+    """RSC history page defining every exercise, padded with unrelated chunks."""
+    rng = random.Random(seed)
+    rows = ['0:["$","html",null,{"children":"$L1"}]', '1:I["app/layout.js",["static/chunks/app.js"],"default"]']
+    exercises = [
+        dict(exercise, input_format=0, popularity=rng.randint(0, 1000)) for exercise in exercise_db.values()
+    ]
+    chunk_id = 2
+    for i in range(0, len(exercises), 20):
+        rows.append(f"{chunk_id:x}:" + json.dumps(["$", "div", None, {"exercises": exercises[i:i + 20]}]))
+        chunk_id += 1
+    size = 0
+    while size < filler_mb * 1024 * 1024:
+        logs = [{'date': rng.randint(1_600_000_000, 1_700_000_000), 'weight': rng.random() * 200,
+                 'markup': "x" * rng.randint(50, 400)} for _ in range(60)]
+        row = f"{chunk_id:x}:" + json.dumps(["$", "section", None, {"logs": logs}])
+        rows.append(row)
+        size += len(row)
+        chunk_id += 1
+    return "\n".join(rows) + "\n"
+
+
+class FakeJEFit:
+    """The fake API server; start() runs it on a background thread."""
+
+    def __init__(self, days=1000, exercises=300, latency=0.0, jitter=0.0, error_rate=0.0,
+                 throttle_rate=0.0, rsc_filler_mb=1.0, fixtures=None, seed=7):
+        dates, sessions, exercise_db = synthetic_dataset(days, exercises, seed)
+        self.calendar = [{'date': date_str, 'has_logs': True} for date_str in dates]
+        self.sessions = sessions
+        self.exercise_db = exercise_db
+        self.rsc_page = None
+        self._rsc_filler_mb = rsc_filler_mb
+        if fixtures:
+            self._load_fixtures(Path(fixtures))
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self.reset_stats()
+
+    def _load_fixtures(self, directory):
+        if (directory / "calendar.json").exists():
+            self.calendar = json.loads((directory / "calendar.json").read_text())
+        if (directory / "sessions.json").exists():
+            self.sessions = json.loads((directory / "sessions.json").read_text())
+        if (directory / "history.rsc").exists():
+            self.rsc_page = (directory / "history.rsc").read_bytes()
+
+    def history_page(self):
+        if self.rsc_page is None:
+            self.rsc_page = history_page(self.exercise_db, self._rsc_filler_mb).encode()
+        return self.rsc_page
+
+    def history_etag(self):
+        return '"' + hashlib.sha1(self.history_page()).hexdigest() + '"'
+
+    def add_exercise(self, exercise):
+        """Add (or replace) an exercise, e.g. a new custom one, and rebuild the history page."""
+        self.exercise_db[exercise['id']] = exercise
+        self.rsc_page = None
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = {}
+            self.bytes_sent = 0
+            self.errors = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'total_requests': sum(self.requests.values()),
+                'bytes_sent': self.bytes_sent,
+                'errors': self.errors,
+            }
+
+    def _record(self, route, size, error=False):
+        with self._lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            self.bytes_sent += size
+            self.errors += error
+
+    def _injected_error(self):
+        """(status, headers) for an injected failure, or None."""
+        with self._lock:
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return 429, {'Retry-After': "1"}
+        if roll < self.throttle_rate + self.error_rate:
+            return 503, {}
+        return None
+
+    def _delay(self):
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; with Nagle's algorithm on, every
+            # keep-alive response after the first stalls ~40 ms on the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, route, status, body, content_type='application/json', headers=None):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                fake._record(route, len(body), error=status >= 400)
+
+            def _authorized(self):
+                return 'jefitAccessToken=' in (self.headers.get('Cookie') or '')
+
+            def _serve(self, route, respond):
+                fake._delay()
+                injected = fake._injected_error()
+                if injected:
+                    status, headers = injected
+                    return self._send(route, status, {'error': "injected"}, headers=headers)
+                respond()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if urlparse(self.path).path == "/api/v2/auth/login":
+                    self._serve('login', lambda: self._send('login', 200, {'accessToken': fake_token()}))
+                else:
+                    self._send('unknown', 404, {'error': "not found"})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                path = url.path
+                if path == "/__stats":
+                    body = json.dumps(fake.stats()).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if not self._authorized():
+                    return self._send('unauthorized', 401, {'error': "missing access token"})
+
+                if path == "/api/v2/user":
+                    self._serve('user', lambda: self._send('user', 200, {'data': {'id': USER_ID}}))
+                elif path == f"/api/v2/users/{USER_ID}/sessions/calendar":
+                    self._serve('calendar', lambda: self._send('calendar', 200, {'data': fake.calendar}))
+                elif path == f"/api/v2/users/{USER_ID}/sessions":
+                    start_date = int(parse_qs(url.query).get('startDate', ["0"])[0])
+                    date_str = time.strftime("%Y-%m-%d", time.localtime(start_date))
+                    payload = fake.sessions.get(date_str, {'data': []})
+                    self._serve('sessions', lambda: self._send('sessions', 200, payload))
+                elif path == "/my-jefit/progress/history":
+                    self._serve('history', self._history)
+                else:
+                    self._send('unknown', 404, {'error': "not found"})
+
+            def _history(self):
+                etag = fake.history_etag()
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    fake._record('history', 0)
+                else:
+                    self._send('history', 200, fake.history_page(), 'text/x-component', {'ETag': etag})
+
+        return Handler
+
+    def _bind(self, host, port):
+        self._server = ThreadingHTTPServer((host, port), self.handler())
+        self._server.daemon_threads = True
+        return f"http://{host}:{self._server.server_port}"
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve on a daemon thread and return the base URL."""
+        base_url = self._bind(host, port)
+        threading.Thread(target=self._server.serve_forever, name="fake-jefit", daemon=True).start()
+        return base_url
+
+    def serve_forever(self, host="127.0.0.1", port=8899):
+        base_url = self._bind(host, port)
+        print(f"Fake JEFit API on {base_url} "
+              f"({len(self.calendar)} workout days, {len(self.exercise_db)} exercises)", file=sys.stderr)
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--days', type=int, default=1000, help="synthetic workout days")
+    parser.add_argument('--exercises', type=int, default=300, help="synthetic catalog size")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random latency up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument('--rsc-filler-mb', type=float, default=1.0, help="unrelated data padding the RSC page")
+    parser.add_argument('--fixtures', type=Path, help="directory of recorded fixtures")
+    args = parser.parse_args()
+
+    fake = FakeJEFit(args.days, args.exercises, args.latency, args.jitter, args.error_rate,
+                     args.throttle_rate, args.rsc_filler_mb, args.fixtures)
+    fake.serve_forever(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
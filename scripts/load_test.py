@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load test the tool path under concurrent MCP sessions against the fake JEFit
+API (scripts/fake_jefit.py), which answers every request after a fixed latency.
+
+Each level opens N in-memory MCP client sessions that call get_workout_info
+for distinct, uncached dates at the same time. The async tool is compared
+with a blocking tool that makes the same upstream request through the
+requests session, which is what every tool used to do.
+
+    uv run python scripts/load_test.py [--latency 0.1] [--calls 32] [--levels 1,2,4,8,16]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+sys.path.insert(0, str(ROOT))
+
+from fake_jefit import FakeJEFit  # noqa: E402
+
+
+async def run_level(mcp, tool, sessions, calls, dates):
+    """Spread `calls` tool calls over `sessions` concurrent client sessions; returns calls/s."""
+    from fastmcp import Client
+
+    per_session = [[next(dates) for _ in range(calls // sessions)] for _ in range(sessions)]
+
+    async def session(session_dates):
+        async with Client(mcp) as client:
+            for date_str in session_dates:
+                await client.call_tool(tool, {'date': date_str})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(d) for d in per_session))
+    elapsed = time.perf_counter() - started
+    return sum(len(d) for d in per_session) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.1, help="upstream latency per request in seconds")
+    parser.add_argument('--calls', type=int, default=32, help="tool calls per level")
+    parser.add_argument('--levels', default="1,2,4,8,16", help="concurrent client sessions per level")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.levels.split(',')]
+
+    # One distinct workout day per call, so every call misses the local caches
+    fake = FakeJEFit(days=2 * len(levels) * args.calls, latency=args.latency)
+    workdir = tempfile.mkdtemp(prefix="jefit-load-")
+    os.chdir(workdir)
+    os.environ.update({
+        'JEFIT_BASE_URL': fake.start(),
+        'JEFIT_USERNAME': "load-test",
+        'JEFIT_PASSWORD': "load-test",
+        'JEFIT_SESSION_DB': str(Path(workdir) / "sessions.sqlite"),
+        'JEFIT_USER_CONCURRENCY': str(max(levels)),
+        'JEFIT_EXERCISE_DB_WAIT': "0",
+        # Measure the tool path, not the client-side limit on JEFit traffic
+        'JEFIT_RATE_LIMIT': "0",
+    })
+
+    import http_client
+    import server
+    from auth import SESSION, auth_headers
+
+    @server.mcp.tool
+    def get_workout_info_blocking(date: str) -> str:
+        """Fetch a date's sessions with the blocking client, as the tools used to."""
+        date_unix = int(time.mktime(time.strptime(date, "%Y-%m-%d")))
+        response = SESSION.call(lambda access_token, user_id: http_client.get(
+            f"/api/v2/users/{user_id}/sessions",
+            params={'startDate': date_unix},
+            headers=auth_headers(access_token)
+        ))
+        return response.text
+
+    async def run():
+        dates = iter(entry['date'] for entry in fake.calendar)
+        print(f"upstream latency {args.latency * 1000:.0f} ms, {args.calls} calls per level")
+        print(f"{'sessions':>8}  {'blocking calls/s':>16}  {'async calls/s':>13}  {'speedup':>7}")
+        for sessions in levels:
+            blocking = await run_level(server.mcp, "get_workout_info_blocking", sessions, args.calls, dates)
+            concurrent = await run_level(server.mcp, "get_workout_info", sessions, args.calls, dates)
+            print(f"{sessions:>8}  {blocking:>16.1f}  {concurrent:>13.1f}  {concurrent / blocking:>6.1f}x")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
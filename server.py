@@ -44,9 +44,23 @@ MCP Server Configuration Examples:
   }
 }
 
+=== Remote/HTTP Configuration with Per-User Credentials ===
+{
+  "mcpServers": {
+    "jefitWorkouts": {
+      "type": "http",
+      "url": "https://jefit-mcp.example.com/mcp/",
+      "headers": {
+        "X-JEFit-Username": "your_username",
+        "X-JEFit-Password": "your_password"
+      }
+    }
+  }
+}
+
 Environment Variables Required:
-- JEFIT_USERNAME: Your JEFit username
-- JEFIT_PASSWORD: Your JEFit password
+- JEFIT_USERNAME: Your JEFit username (optional over HTTP when clients send credentials)
+- JEFIT_PASSWORD: Your JEFit password (optional over HTTP when clients send credentials)
 - JEFIT_TIMEZONE: Your timezone offset (e.g., "-04:00" for EDT)
 
 Place this configuration in:
@@ -57,13 +71,38 @@ Place this configuration in:
 """
 
 import os
+import sys
+import time
 from datetime import datetime, date
+from typing import Literal
 from fastmcp import FastMCP
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware
 from fastmcp.tools.tool import ToolResult
 from mcp.types import TextContent
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
-from history import get_workout_history
-from workout_info import get_workout_for_date, load_exercise_db
+from auth import SESSION, account_key, activate_user, deactivate_user, user_session_count
+from history import get_workout_dates
+from calendar_index import CALENDAR
+from session_store import STORE
+from single_flight import FLIGHTS
+from rate_limit import LIMITER
+from metrics import METRICS, profile
+from prefetch import PREFETCH_ENABLED, PREFETCHER
+from workout_info import get_workout_for_date, get_workouts_for_dates, get_workouts_between, load_sets_between
+from set_store import SetLogStore, drop_set_store
+from exercise_catalog import EXERCISE_CATALOG
+from exercise_search import get_exercise_index
+from catalog_db import CATALOG_PATH
+from render import MAX_RESPONSE_CHARS, get_renderer
+from models import workouts_payload
+from utils import json_response
+from analytics import match_exercises, exercise_progress, weekly_sets_by_body_part, volume_by_period, personal_records
+
+# Reference point for the startup-time metrics below
+PROCESS_STARTED = time.perf_counter()
 
 # Initialize FastMCP server
 mcp = FastMCP(
@@ -75,56 +114,146 @@ mcp = FastMCP(
     """
 )
 
-# Load exercise database once at startup
-EXERCISE_DB = load_exercise_db()
+# Load exercise database in the background so startup isn't blocked on it. Without
+# configured credentials, the first tool call that brings its own starts it instead.
+if account_key() or CATALOG_PATH.exists():
+    EXERCISE_CATALOG.start_loading()
+
+
+class StartupTimer(Middleware):
+    """Record how long after process start the first MCP request was answered."""
+    
+    def __init__(self):
+        self.ready_seconds = None
+        self.first_response_seconds = None
+    
+    async def on_request(self, context, call_next):
+        result = await call_next(context)
+        if self.first_response_seconds is None:
+            self.first_response_seconds = time.perf_counter() - PROCESS_STARTED
+            print(f"✓ First response {self.first_response_seconds:.3f}s after startup", file=sys.stderr)
+        return result
+    
+    def stats(self):
+        return {
+            'ready_seconds': round(self.ready_seconds, 3) if self.ready_seconds is not None else None,
+            'first_response_seconds': (
+                round(self.first_response_seconds, 3) if self.first_response_seconds is not None else None
+            ),
+        }
+
+
+STARTUP_TIMER = StartupTimer()
+mcp.add_middleware(STARTUP_TIMER)
+
+
+class UserCredentials(Middleware):
+    """Serve tool calls as the JEFit user whose credentials came with the HTTP request.
+    
+    Requests send either X-JEFit-Username and X-JEFit-Password, or an
+    X-JEFit-Token access token. Requests without any of them (and stdio) use
+    the account configured in .env; a username without a password (or the
+    reverse) is rejected rather than served as that account.
+    """
+    
+    async def on_call_tool(self, context, call_next):
+        headers = get_http_headers()
+        username = headers.get('x-jefit-username')
+        password = headers.get('x-jefit-password')
+        access_token = headers.get('x-jefit-token')
+        if not access_token and bool(username) != bool(password):
+            raise ValueError("Send both X-JEFit-Username and X-JEFit-Password, or an X-JEFit-Token")
+        if not access_token and not username:
+            return await call_next(context)
+        
+        user = await activate_user(username, password, access_token)
+        try:
+            return await call_next(context)
+        finally:
+            deactivate_user(user)
+
+
+mcp.add_middleware(UserCredentials())
+
+
+class ToolMetrics(Middleware):
+    """Time every tool call, and cProfile it when JEFIT_PROFILE_DIR is set."""
+    
+    async def on_call_tool(self, context, call_next):
+        name = context.message.name
+        async with profile(name):
+            with METRICS.span(f"tool.{name}"):
+                return await call_next(context)
+
+
+mcp.add_middleware(ToolMetrics())
+
+OutputFormat = Literal["markdown", "table", "json"]
+
+
+async def workouts_response(
+    dates: list[str],
+    results: dict[str, dict | Exception],
+    format: str,
+    max_chars: int | None = None
+) -> ToolResult:
+    """Render fetched dates as markdown/table text, or as structured JSON."""
+    exercise_db = await EXERCISE_CATALOG.get_db_async()
+    # Exercises created since the catalog was fetched are picked up by a background refresh
+    EXERCISE_CATALOG.refresh_if_unknown(
+        log['exercise_id']
+        for result in results.values() if isinstance(result, dict)
+        for session in result.get('data') or []
+        for log in session.get('logs') or []
+    )
+    with METRICS.span("render"):
+        if format == "json":
+            return json_response(workouts_payload(dates, results, exercise_db))
+        
+        renderer = get_renderer(exercise_db)
+        markdown_text = renderer.render(dates, results, format, MAX_RESPONSE_CHARS if max_chars is None else max_chars)
+    return ToolResult(content=[TextContent(type="text", text=markdown_text)])
 
 
 @mcp.tool
-def list_workout_dates(start_date: str, end_date: str | None = None) -> list[str]:
+async def list_workout_dates(
+    start_date: str,
+    end_date: str | None = None,
+    exercise: str | None = None,
+    body_part: str | None = None
+) -> list[str]:
     """
     List all workout dates within a date range.
     
     Args:
         start_date: Start date in YYYY-MM-DD format (required)
         end_date: End date in YYYY-MM-DD format (optional, defaults to today)
+        exercise: Only dates on which this exercise (id or part of its name) was logged (optional)
+        body_part: Only dates with an exercise for this body part, e.g. "chest" (optional)
     
     Returns:
         List of workout dates as strings in YYYY-MM-DD format
     """
-    # Default end_date to today if not provided
-    if end_date is None:
-        end_date = date.today().isoformat()
+    start, end = parse_date_range(start_date, end_date)
     
-    # Validate date formats
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end = datetime.strptime(end_date, "%Y-%m-%d").date()
-    except ValueError as e:
-        raise ValueError(f"Invalid date format. Use YYYY-MM-DD format: {e}")
+    if exercise or body_part:
+        set_store = await load_sets_between(start, end)
+        EXERCISE_CATALOG.refresh_if_unknown(set_store.exercise_ids)
+        exercise_ids = resolve_exercise_filter(exercise, body_part, set_store, await EXERCISE_CATALOG.get_db_async())
+        return set_store.dates_with_exercises(exercise_ids, start, end)
     
-    if start > end:
-        raise ValueError("start_date must be before or equal to end_date")
-    
-    # Get all workout dates from API
-    all_dates = get_workout_history()
-    
-    # Filter to date range
-    filtered_dates = []
-    for workout_date_str in all_dates:
-        workout_date = datetime.strptime(workout_date_str, "%Y-%m-%d").date()
-        if start <= workout_date <= end:
-            filtered_dates.append(workout_date_str)
-    
-    return sorted(filtered_dates)
+    # Range query against the locally synced, sorted calendar index
+    return await get_workout_dates(start, end)
 
 
 @mcp.tool
-def get_workout_info(date: str) -> ToolResult:
+async def get_workout_info(date: str, format: OutputFormat = "markdown") -> ToolResult:
     """
     Get detailed workout information for a specific date.
     
     Args:
         date: Date in YYYY-MM-DD format
+        format: "markdown" for full details, "table" for one compact row per exercise with sets collapsed, or "json" for structured sessions -> exercises -> sets data
     
     Returns:
         Markdown-formatted workout details including exercises, sets, reps, and weights
@@ -136,61 +265,25 @@ def get_workout_info(date: str) -> ToolResult:
         raise ValueError(f"Invalid date format. Use YYYY-MM-DD format: {e}")
     
     # Get workout data from API
-    workout_data = get_workout_for_date(date)
+    workout_data = await get_workout_for_date(date)
+    PREFETCHER.hint(date)
     
-    # Build markdown output
-    output_lines = []
-    output_lines.append(f"# Workout for {date}\n")
-    
-    if 'data' not in workout_data or not workout_data['data']:
-        output_lines.append("No workout found for this date.")
-        markdown_text = "\n".join(output_lines)
-        return ToolResult(content=[TextContent(type="text", text=markdown_text)])
-    
-    for session in workout_data['data']:
-        session_date = datetime.fromtimestamp(session['date']).strftime('%Y-%m-%d %H:%M:%S')
-        duration_minutes = session['total_time'] // 60
-        duration_seconds = session['total_time'] % 60
-        total_weight = session['total_weight']
-        
-        output_lines.append(f"**Started:** {session_date}")
-        output_lines.append(f"**Duration:** {duration_minutes}m {duration_seconds}s")
-        output_lines.append(f"**Weight Lifted:** {total_weight} lbs\n")
-        
-        output_lines.append("## Exercises\n")
-        
-        for i, log in enumerate(session['logs'], 1):
-            exercise_id = log['exercise_id']
-            exercise = EXERCISE_DB.get(exercise_id, {})
-            
-            name = exercise.get('name', f'Unknown Exercise ({exercise_id})')
-            muscle_groups = ', '.join(exercise.get('body_parts', ['Unknown']))
-            equipment = ', '.join(exercise.get('equipment', ['Unknown']))
-            
-            output_lines.append(f"### {i}. {name}")
-            output_lines.append(f"- **Muscle Groups:** {muscle_groups}")
-            output_lines.append(f"- **Equipment:** {equipment}")
-            output_lines.append("")
-            
-            # Add sets information
-            for j, s in enumerate(log['log_sets'], 1):
-                weight = s.get('weight', 0)
-                reps = s.get('reps', 0)
-                output_lines.append(f"  - Set {j}: {weight} lbs × {reps} reps")
-            
-            output_lines.append("")  # Blank line between exercises
-    
-    markdown_text = "\n".join(output_lines)
-    return ToolResult(content=[TextContent(type="text", text=markdown_text)])
+    return await workouts_response([date], {date: workout_data}, format)
 
 
 @mcp.tool
-def get_batch_workouts(dates: list[str]) -> ToolResult:
+async def get_batch_workouts(
+    dates: list[str],
+    format: OutputFormat = "markdown",
+    max_chars: int | None = None
+) -> ToolResult:
     """
     Get detailed workout information for multiple dates in a single call.
     
     Args:
         dates: List of dates in YYYY-MM-DD format
+        format: "markdown" for full details, "table" for one compact row per exercise with sets collapsed, or "json" for structured sessions -> exercises -> sets data
+        max_chars: Response size budget in characters for text formats (optional); older workouts beyond it are summarized
     
     Returns:
         Markdown-formatted workout details for all requested dates
@@ -205,57 +298,390 @@ def get_batch_workouts(dates: list[str]) -> ToolResult:
         except ValueError as e:
             raise ValueError(f"Invalid date format '{date_str}'. Use YYYY-MM-DD format: {e}")
     
-    # Build combined markdown output
-    all_workouts = []
+    # Fetch each unique date once, in parallel
+    unique_dates = sorted(set(dates))
+    results = await get_workouts_for_dates(unique_dates)
+    PREFETCHER.hint(unique_dates[0], unique_dates[-1])
     
-    for date_str in sorted(dates):
-        # Get workout data from API
-        workout_data = get_workout_for_date(date_str)
-        
-        output_lines = []
-        output_lines.append(f"# Workout for {date_str}\n")
-        
-        if 'data' not in workout_data or not workout_data['data']:
-            output_lines.append("No workout found for this date.\n")
-        else:
-            for session in workout_data['data']:
-                session_date = datetime.fromtimestamp(session['date']).strftime('%Y-%m-%d %H:%M:%S')
-                duration_minutes = session['total_time'] // 60
-                duration_seconds = session['total_time'] % 60
-                total_weight = session['total_weight']
-                
-                output_lines.append(f"**Started:** {session_date}")
-                output_lines.append(f"**Duration:** {duration_minutes}m {duration_seconds}s")
-                output_lines.append(f"**Weight Lifted:** {total_weight} lbs\n")
-                
-                output_lines.append("## Exercises\n")
-                
-                for i, log in enumerate(session['logs'], 1):
-                    exercise_id = log['exercise_id']
-                    exercise = EXERCISE_DB.get(exercise_id, {})
-                    
-                    name = exercise.get('name', f'Unknown Exercise ({exercise_id})')
-                    muscle_groups = ', '.join(exercise.get('body_parts', ['Unknown']))
-                    equipment = ', '.join(exercise.get('equipment', ['Unknown']))
-                    
-                    output_lines.append(f"### {i}. {name}")
-                    output_lines.append(f"- **Muscle Groups:** {muscle_groups}")
-                    output_lines.append(f"- **Equipment:** {equipment}")
-                    output_lines.append("")
-                    
-                    # Add sets information
-                    for j, s in enumerate(log['log_sets'], 1):
-                        weight = s.get('weight', 0)
-                        reps = s.get('reps', 0)
-                        output_lines.append(f"  - Set {j}: {weight} lbs × {reps} reps")
-                    
-                    output_lines.append("")  # Blank line between exercises
+    return await workouts_response(unique_dates, results, format, max_chars)
+
+
+@mcp.tool
+async def get_workouts_in_range(
+    start_date: str,
+    end_date: str | None = None,
+    format: OutputFormat = "markdown",
+    max_chars: int | None = None,
+    exercise: str | None = None,
+    body_part: str | None = None
+) -> ToolResult:
+    """
+    Get detailed workout information for every workout within a date range.
+    
+    Prefer this over get_batch_workouts for spans of weeks or months: only
+    days that have workouts are fetched, and previously fetched days come
+    from the local cache.
+    
+    Args:
+        start_date: Start date in YYYY-MM-DD format (required)
+        end_date: End date in YYYY-MM-DD format (optional, defaults to today)
+        format: "markdown" for full details, "table" for one compact row per exercise with sets collapsed, or "json" for structured sessions -> exercises -> sets data
+        max_chars: Response size budget in characters for text formats (optional); older workouts beyond it are summarized
+        exercise: Only show this exercise (id or part of its name), on the days it was logged (optional)
+        body_part: Only show exercises for this body part, e.g. "chest", on the days they were logged (optional)
+    
+    Returns:
+        Markdown-formatted workout details for each workout date in the range
+    """
+    start, end = parse_date_range(start_date, end_date)
+    
+    if exercise or body_part:
+        # The set-log index knows which days have the exercises; only those payloads are read
+        set_store = await load_sets_between(start, end)
+        EXERCISE_CATALOG.refresh_if_unknown(set_store.exercise_ids)
+        exercise_ids = resolve_exercise_filter(exercise, body_part, set_store, await EXERCISE_CATALOG.get_db_async())
+        matching_dates = set_store.dates_with_exercises(exercise_ids, start, end)
+        results = {
+            date_str: only_exercises(workout_data, exercise_ids)
+            for date_str, workout_data in (await get_workouts_for_dates(matching_dates)).items()
+        }
+    else:
+        results = await get_workouts_between(start, end)
+    PREFETCHER.hint(start, end)
+    if not results and format != "json":
+        return ToolResult(content=[TextContent(type="text", text=f"No workouts found between {start} and {end}.")])
+    
+    return await workouts_response(sorted(results), results, format, max_chars)
+
+
+@mcp.tool
+async def refresh_workout_cache(dates: list[str] | None = None) -> ToolResult:
+    """
+    Invalidate locally cached workouts and re-fetch them from JEFit.
+    
+    Use when a workout was edited in JEFit after it was first fetched.
+    
+    Args:
+        dates: Dates in YYYY-MM-DD format to refresh (optional, defaults to clearing the whole cache)
+    
+    Returns:
+        Summary of the refreshed dates and cache hit/miss statistics
+    """
+    account = account_key()
+    output_lines = []
+    
+    if dates is None:
+        removed = STORE.invalidate(account)
+        drop_set_store(account)
+        CALENDAR.expire(account)
+        output_lines.append(f"Cleared {removed} cached workout dates.")
+    else:
+        for date_str in dates:
+            try:
+                datetime.strptime(date_str, "%Y-%m-%d")
+            except ValueError as e:
+                raise ValueError(f"Invalid date format '{date_str}'. Use YYYY-MM-DD format: {e}")
         
-        all_workouts.append("\n".join(output_lines))
+        unique_dates = sorted(set(dates))
+        STORE.invalidate(account, unique_dates)
+        for date_str in unique_dates:
+            try:
+                await get_workout_for_date(date_str, refresh=True)
+                output_lines.append(f"- {date_str}: refreshed")
+            except Exception as e:
+                output_lines.append(f"- {date_str}: failed ({e})")
     
-    # Join all workouts with separator
-    markdown_text = "\n---\n\n".join(all_workouts)
-    return ToolResult(content=[TextContent(type="text", text=markdown_text)])
+    stats = STORE.stats()
+    output_lines.append("")
+    output_lines.append(
+        f"**Cache:** {stats['entries']} entries, {stats['hits']} hits, "
+        f"{stats['misses']} misses, {stats['stale']} stale (hit rate {stats['hit_rate']:.0%})"
+    )
+    flights = FLIGHTS.stats()
+    output_lines.append(
+        f"**Coalescing:** {flights['coalesced']} of {flights['calls']} upstream calls "
+        f"shared an identical request already in flight"
+    )
+    limits = LIMITER.stats()
+    output_lines.append(
+        f"**Rate limit:** {limits['rate']:g}/{limits['max_rate']:g} requests/s, "
+        f"{limits['throttled']} throttled (429) responses, {limits['wait_seconds']:g}s spent waiting"
+    )
+    return ToolResult(content=[TextContent(type="text", text="\n".join(output_lines))])
+
+
+def component_stats() -> dict:
+    """Startup timings and stats of the caches, call coalescing, rate limiter, prefetcher, logins and exercise catalog."""
+    return {
+        'startup': STARTUP_TIMER.stats(),
+        'session_cache': STORE.stats(),
+        'coalescing': FLIGHTS.stats(),
+        'rate_limit': LIMITER.stats(),
+        'prefetch': PREFETCHER.stats(),
+        'auth': dict(SESSION.stats(), user_sessions=user_session_count()),
+        'exercise_catalog': EXERCISE_CATALOG.stats(),
+    }
+
+
+@mcp.tool
+async def server_stats() -> ToolResult:
+    """
+    Report where the server spends its time and how well its caches work.
+    
+    Returns:
+        JSON with timing spans (count, errors, average and max ms) for logins,
+        upstream fetches, RSC parsing, rendering and each tool; counters for
+        upstream requests, bytes downloaded and cache lookups; how long startup
+        took until the server was ready and until its first response; and the stats
+        of the session cache, call coalescing, rate limiter, prefetcher and exercise catalog
+    """
+    return json_response({
+        'uptime_seconds': round(time.perf_counter() - PROCESS_STARTED, 1),
+        **METRICS.snapshot(),
+        'components': component_stats(),
+    })
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint (streamable-http transport only)."""
+    gauges = {'uptime_seconds': time.perf_counter() - PROCESS_STARTED}
+    for component, stats in component_stats().items():
+        for key, value in stats.items():
+            gauges[f"{component}_{key}"] = value
+    return PlainTextResponse(METRICS.prometheus(gauges), media_type="text/plain; version=0.0.4")
+
+
+def parse_date_range(start_date: str, end_date: str | None) -> tuple[str, str]:
+    """Validate a YYYY-MM-DD range (end defaults to today) and return it as ISO strings."""
+    if end_date is None:
+        end_date = date.today().isoformat()
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError as e:
+        raise ValueError(f"Invalid date format. Use YYYY-MM-DD format: {e}")
+    if start > end:
+        raise ValueError("start_date must be before or equal to end_date")
+    return start.isoformat(), end.isoformat()
+
+
+def resolve_exercise(query: str, set_store: SetLogStore, exercise_db) -> list[str]:
+    """Exercise ids logged in `set_store` that match an exercise id or name fragment."""
+    exercise_ids = match_exercises(query, set_store.exercise_ids, exercise_db)
+    if not exercise_ids:
+        # Fall back to a typo-tolerant search ("incline db press")
+        logged = set(set_store.exercise_ids)
+        exercise_ids = [e for e in get_exercise_index(exercise_db).matching_ids(query) if e in logged]
+    if not exercise_ids:
+        raise ValueError(f"No logged exercise matches '{query}'")
+    return exercise_ids
+
+
+def resolve_exercise_filter(
+    exercise: str | None,
+    body_part: str | None,
+    set_store: SetLogStore,
+    exercise_db
+) -> list[str]:
+    """Logged exercise ids matching an exercise id or name and/or a body part."""
+    exercise_ids = resolve_exercise(exercise, set_store, exercise_db) if exercise else set_store.exercise_ids
+    if body_part:
+        tagged = set(get_exercise_index(exercise_db).matching_ids(body_part=body_part))
+        exercise_ids = [e for e in exercise_ids if e in tagged]
+        if not exercise_ids:
+            raise ValueError(f"No logged exercise works '{body_part}'")
+    return exercise_ids
+
+
+def only_exercises(workout_data: dict | Exception, exercise_ids: list[str]) -> dict | Exception:
+    """Copy of a sessions payload with only the logs of `exercise_ids` (session totals are unchanged)."""
+    if not isinstance(workout_data, dict):
+        return workout_data
+    wanted = set(exercise_ids)
+    sessions = []
+    for session in workout_data.get('data') or []:
+        logs = [log for log in session.get('logs') or [] if log['exercise_id'] in wanted]
+        if logs:
+            sessions.append(dict(session, logs=logs))
+    return dict(workout_data, data=sessions)
+
+
+def exercise_names(exercise_ids: list[str], exercise_db) -> str:
+    return ", ".join(exercise_db.get(e, {}).get('name', e) for e in exercise_ids)
+
+
+@mcp.tool
+async def get_exercise_progress(
+    exercise: str,
+    start_date: str,
+    end_date: str | None = None,
+    period: Literal["day", "week", "month"] = "week"
+) -> ToolResult:
+    """
+    Summarize volume and estimated 1RM progression for an exercise, computed server-side.
+    
+    Args:
+        exercise: Exercise id or part of its name (e.g. "bench press")
+        start_date: Start date in YYYY-MM-DD format (required)
+        end_date: End date in YYYY-MM-DD format (optional, defaults to today)
+        period: Bucket size: "day", "week" (default) or "month"
+    
+    Returns:
+        Markdown table of sets, volume (lbs), top set weight and best estimated 1RM (Epley) per period,
+        followed by each exercise's best over every workout loaded so far
+    """
+    start, end = parse_date_range(start_date, end_date)
+    exercise_db = await EXERCISE_CATALOG.get_db_async()
+    set_store = await load_sets_between(start, end)
+    EXERCISE_CATALOG.refresh_if_unknown(set_store.exercise_ids)
+    exercise_ids = resolve_exercise(exercise, set_store, exercise_db)
+    
+    output_lines = [f"# Progress: {exercise_names(exercise_ids, exercise_db)} ({start} to {end})\n"]
+    output_lines.append(f"| {period.capitalize()} | Sets | Volume (lbs) | Top Set (lbs) | Est. 1RM (lbs) |")
+    output_lines.append("|---|---|---|---|---|")
+    for bucket in exercise_progress(set_store, exercise_ids, start, end, period):
+        output_lines.append(
+            f"| {bucket['period']} | {bucket['sets']} | {bucket['volume']:,.0f} | "
+            f"{bucket['top_weight']:g} | {bucket['best_e1rm']:.1f} |"
+        )
+    
+    bests = []
+    for exercise_id in exercise_ids:
+        best = set_store.best(exercise_id)
+        if best is not None:
+            bests.append(f"{exercise_names([exercise_id], exercise_db)}: {best[0]:g} lbs, est. 1RM {best[1]:.1f}")
+    if bests:
+        output_lines.append("\n**Best across all loaded workouts:** " + "; ".join(bests))
+    return ToolResult(content=[TextContent(type="text", text="\n".join(output_lines))])
+
+
+@mcp.tool
+async def get_weekly_body_part_sets(start_date: str, end_date: str | None = None) -> ToolResult:
+    """
+    Count working sets per body part per week, computed server-side.
+    
+    A set counts toward every body part listed for its exercise.
+    
+    Args:
+        start_date: Start date in YYYY-MM-DD format (required)
+        end_date: End date in YYYY-MM-DD format (optional, defaults to today)
+    
+    Returns:
+        Markdown table with one row per week (starting Monday), one column per body part
+        and the week's total volume (lbs)
+    """
+    start, end = parse_date_range(start_date, end_date)
+    exercise_db = await EXERCISE_CATALOG.get_db_async()
+    set_store = await load_sets_between(start, end)
+    EXERCISE_CATALOG.refresh_if_unknown(set_store.exercise_ids)
+    weeks = weekly_sets_by_body_part(set_store, exercise_db, start, end)
+    if not weeks:
+        return ToolResult(content=[TextContent(type="text", text=f"No sets logged between {start} and {end}.")])
+    
+    volume = volume_by_period(set_store, start, end, "week")
+    body_parts = sorted({body_part for counts in weeks.values() for body_part in counts})
+    output_lines = [f"# Weekly sets by body part ({start} to {end})\n"]
+    output_lines.append("| Week | " + " | ".join(body_parts) + " | Volume (lbs) |")
+    output_lines.append("|---|" + "---|" * (len(body_parts) + 1))
+    for week, counts in weeks.items():
+        output_lines.append(
+            f"| {week} | " + " | ".join(str(counts.get(bp, 0)) for bp in body_parts) + f" | {volume.get(week, 0):,.0f} |"
+        )
+    return ToolResult(content=[TextContent(type="text", text="\n".join(output_lines))])
+
+
+@mcp.tool
+async def get_personal_records(start_date: str, end_date: str | None = None, exercise: str | None = None) -> ToolResult:
+    """
+    Detect personal records (heaviest weight and best estimated 1RM) within a date range.
+    
+    Records are relative to earlier sets in the same range; the first day an
+    exercise appears only sets its baseline.
+    
+    Args:
+        start_date: Start date in YYYY-MM-DD format (required)
+        end_date: End date in YYYY-MM-DD format (optional, defaults to today)
+        exercise: Exercise id or part of its name (optional, defaults to all exercises)
+    
+    Returns:
+        Markdown list of records in date order
+    """
+    start, end = parse_date_range(start_date, end_date)
+    exercise_db = await EXERCISE_CATALOG.get_db_async()
+    set_store = await load_sets_between(start, end)
+    EXERCISE_CATALOG.refresh_if_unknown(set_store.exercise_ids)
+    exercise_ids = resolve_exercise(exercise, set_store, exercise_db) if exercise else None
+    
+    records = personal_records(set_store, start, end, exercise_ids)
+    if not records:
+        return ToolResult(content=[TextContent(type="text", text=f"No personal records between {start} and {end}.")])
+    
+    labels = {'weight': "heaviest weight", 'e1rm': "est. 1RM"}
+    output_lines = [f"# Personal records ({start} to {end})\n"]
+    for record in records:
+        output_lines.append(
+            f"- **{record['date']}** {exercise_names([record['exercise_id']], exercise_db)}: "
+            f"{labels[record['type']]} {record['value']:g} lbs (previous {record['previous']:g})"
+        )
+    return ToolResult(content=[TextContent(type="text", text="\n".join(output_lines))])
+
+
+@mcp.tool
+async def search_exercises(
+    query: str | None = None,
+    body_part: str | None = None,
+    equipment: str | None = None,
+    limit: int = 20,
+    format: Literal["markdown", "json"] = "markdown"
+) -> ToolResult:
+    """
+    Search the exercise catalog by name (typo-tolerant), body part and/or equipment.
+    
+    Args:
+        query: Exercise id, name or part of it, e.g. "incline db press" (optional)
+        body_part: Only exercises for this body part, e.g. "chest" (optional)
+        equipment: Only exercises using this equipment, e.g. "dumbbell" (optional)
+        limit: Maximum number of results (default 20)
+        format: "markdown" for a table, or "json" for structured results with match scores
+    
+    Returns:
+        Matching exercises, best name match first and then most popular, with the ids other tools accept
+    """
+    if not (query or body_part or equipment):
+        raise ValueError("Provide a query, body_part or equipment")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    
+    index = get_exercise_index(await EXERCISE_CATALOG.get_db_async())
+    matches = index.search(query, body_part, equipment, limit)
+    if format == "json":
+        return json_response({'exercises': [dict(exercise, score=score) for exercise, score in matches]})
+    
+    criteria = ", ".join(
+        text for text in (
+            f'"{query}"' if query else None,
+            f"body part {body_part}" if body_part else None,
+            f"equipment {equipment}" if equipment else None,
+        ) if text
+    )
+    if not matches:
+        output_lines = [f"No exercises match {criteria}."]
+        if body_part:
+            output_lines.append(f"Known body parts: {', '.join(index.body_parts())}")
+        if equipment:
+            output_lines.append(f"Known equipment: {', '.join(index.equipment())}")
+        return ToolResult(content=[TextContent(type="text", text="\n".join(output_lines))])
+    
+    output_lines = [f"# Exercises matching {criteria}\n"]
+    output_lines.append("| Exercise | ID | Body Parts | Equipment |")
+    output_lines.append("|---|---|---|---|")
+    for exercise, _ in matches:
+        output_lines.append(
+            f"| {exercise.get('name')} | {exercise['id']} | "
+            f"{', '.join(exercise.get('body_parts') or [])} | {', '.join(exercise.get('equipment') or [])} |"
+        )
+    return ToolResult(content=[TextContent(type="text", text="\n".join(output_lines))])
 
 
 def main():
@@ -263,12 +689,22 @@ def main():
     mcp_host = os.getenv("HOST", "127.0.0.1")
     mcp_port = os.getenv("PORT", None)
     
-    if mcp_port:
-        # Run with HTTP transport
-        mcp.run(port=int(mcp_port), host=mcp_host, transport="streamable-http")
-    else:
-        # Run with stdio transport (default)
-        mcp.run()
+    STARTUP_TIMER.ready_seconds = time.perf_counter() - PROCESS_STARTED
+    print(f"✓ Server ready in {STARTUP_TIMER.ready_seconds:.3f}s", file=sys.stderr)
+    
+    # Optionally keep recent workouts warm in the background
+    if PREFETCH_ENABLED:
+        PREFETCHER.start()
+    
+    try:
+        if mcp_port:
+            # Run with HTTP transport
+            mcp.run(port=int(mcp_port), host=mcp_host, transport="streamable-http")
+        else:
+            # Run with stdio transport (default)
+            mcp.run()
+    finally:
+        PREFETCHER.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+"""
+On-disk cache of raw workout session payloads, keyed by account and date.
+
+Past workouts practically never change, so a date that was fetched after it
+left the recent window is served from disk forever. Dates inside the window
+(the last RECENT_WINDOW_HOURS) may still gain logs and are revalidated once
+their cached copy is older than RECENT_TTL seconds.
+
+The same database file also holds the calendar index and custom exercises.
+Every store in it goes through one shared connection and lock (SessionDB),
+so the process has a single writer to the file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_PATH = Path(os.getenv("JEFIT_SESSION_DB", "data/sessions.sqlite"))
+RECENT_WINDOW_HOURS = int(os.getenv("JEFIT_RECENT_WINDOW_HOURS", "48"))
+RECENT_TTL = int(os.getenv("JEFIT_RECENT_TTL", "300"))
+
+
+SCHEMA = ("""
+    CREATE TABLE IF NOT EXISTS sessions (
+        account TEXT NOT NULL,
+        date TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        PRIMARY KEY (account, date)
+    )
+""",)
+
+
+def day_end_timestamp(date_str):
+    """Unix timestamp of local midnight at the end of `date_str`."""
+    return time.mktime(time.strptime(date_str, "%Y-%m-%d")) + 86400
+
+
+class SessionDB:
+    """The process's one connection to a session database file.
+
+    A sqlite3 connection can't be used by two threads at once, so every store
+    in the file holds `lock` (reentrant) around its reads and writes.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock = threading.RLock()
+        self._conn = None
+        self._schemas = set()
+
+    def connection(self, schema):
+        """The shared connection, with `schema` (CREATE ... IF NOT EXISTS statements) applied. Hold `lock`."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        if schema not in self._schemas:
+            for statement in schema:
+                self._conn.execute(statement)
+            self._conn.commit()
+            self._schemas.add(schema)
+        return self._conn
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def session_db(path=DB_PATH):
+    """The shared SessionDB for a database file."""
+    key = os.path.abspath(path)
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None:
+            db = _databases[key] = SessionDB(path)
+        return db
+
+
+class SessionStore:
+    """SQLite-backed session cache shared by every tool call in the process."""
+
+    def __init__(self, path=DB_PATH):
+        self._db = session_db(path)
+        self._lock = self._db.lock
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def _connection(self):
+        return self._db.connection(SCHEMA)
+
+    def is_fresh(self, date_str, fetched_at, now=None):
+        """A cached entry is fresh if fetched after the date settled, or within the TTL."""
+        now = time.time() if now is None else now
+        settled_at = day_end_timestamp(date_str) + RECENT_WINDOW_HOURS * 3600
+        return fetched_at >= settled_at or now - fetched_at < RECENT_TTL
+    
+    def expiring(self, account, dates, within):
+        """The dates among `dates` that are missing, or whose cached copy goes stale in the next `within` seconds."""
+        with self._lock:
+            fetched = dict(self._connection().execute(
+                f"SELECT date, fetched_at FROM sessions WHERE account = ? AND date IN ({','.join('?' * len(dates))})",
+                (account, *dates)
+            ).fetchall())
+        later = time.time() + within
+        return [
+            date_str for date_str in dates
+            if date_str not in fetched or not self.is_fresh(date_str, fetched[date_str], later)
+        ]
+
+    def get(self, account, date_str):
+        """Return the cached payload for a date, or None if missing or stale."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT payload, fetched_at FROM sessions WHERE account = ? AND date = ?",
+                (account, date_str)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if not self.is_fresh(date_str, row[1]):
+                self.stale += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, account, date_str, payload):
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (account, date, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                (account, date_str, json.dumps(payload, separators=(',', ':')), time.time())
+            )
+            conn.commit()
+
+    def invalidate(self, account, dates=None):
+        """Drop cached dates (all of the account's dates if `dates` is None). Returns rows removed."""
+        with self._lock:
+            conn = self._connection()
+            if dates is None:
+                cursor = conn.execute("DELETE FROM sessions WHERE account = ?", (account,))
+            else:
+                cursor = conn.executemany(
+                    "DELETE FROM sessions WHERE account = ? AND date = ?",
+                    [(account, d) for d in dates]
+                )
+            conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        lookups = self.hits + self.misses + self.stale
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+STORE = SessionStore()
@@ -0,0 +1,320 @@
+"""
+In-memory columnar store of every logged set, per account.
+
+Sets live in parallel arrays (date, exercise, weight, reps, session) and are
+indexed by date and by exercise, so range and per-exercise queries are
+bisected slices rather than scans over nested session dicts. Daily tonnage,
+per-day summaries of each exercise and per-exercise bests are maintained as
+days are added, so summaries over a range read one entry per exercise and day
+instead of every set. A re-fetched day replaces its earlier rows, and the
+columns are compacted once replaced rows make up half of them.
+"""
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from auth import MAX_USER_SESSIONS
+from lru import LRUDict
+
+
+def estimated_1rm(weight, reps):
+    """Epley estimate of the one-rep max for a set."""
+    if reps <= 0 or weight <= 0:
+        return 0.0
+    if reps == 1:
+        return float(weight)
+    return weight * (1 + reps / 30)
+
+
+def _ordinal(date_str):
+    return date.fromisoformat(date_str).toordinal()
+
+
+class SetLogStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Columns, one entry per set
+        self.date = array('i')
+        self.exercise = array('i')
+        self.weight = array('d')
+        self.reps = array('i')
+        self.session = array('i')
+        self.active = bytearray()
+        self._dead = 0
+        # Interned exercise ids and session keys
+        self.exercise_ids = []
+        self._exercise_index = {}
+        self.session_keys = []
+        # Indexes: sorted day ordinals -> rows, and per exercise sorted (day, row) pairs
+        self._days = []
+        self._rows_by_day = {}
+        self._by_exercise = {}
+        # Aggregates: day -> tonnage, day -> {exercise: (sets, volume, top weight, best e1rm)},
+        # exercise -> sorted days it was logged on, and each exercise's best weight and e1rm
+        self.daily_tonnage = {}
+        self._day_summaries = {}
+        self._exercise_days = {}
+        self.exercise_max = {}
+        self.exercise_best_e1rm = {}
+
+    def _intern_exercise(self, exercise_id):
+        index = self._exercise_index.get(exercise_id)
+        if index is None:
+            index = self._exercise_index[exercise_id] = len(self.exercise_ids)
+            self.exercise_ids.append(exercise_id)
+            self._by_exercise[index] = []
+            self._exercise_days[index] = []
+        return index
+
+    def has_day(self, date_str):
+        return _ordinal(date_str) in self._rows_by_day
+
+    def add_day(self, date_str, workout_data):
+        """Add (or replace) one date's sets from a /sessions payload."""
+        day = _ordinal(date_str)
+        # Coerce every set before touching the columns, so a malformed payload leaves the store as it was
+        sessions = []
+        for session in workout_data.get('data') or []:
+            sets = [
+                (log['exercise_id'], float(s.get('weight', 0) or 0), int(s.get('reps', 0) or 0))
+                for log in session['logs']
+                for s in log['log_sets']
+            ]
+            sessions.append((f"{date_str}:{session.get('id', session.get('date'))}", sets))
+
+        with self._lock:
+            self._remove_day(day)
+            rows = array('i')
+            new_pairs = {}
+            for session_key, sets in sessions:
+                session_index = len(self.session_keys)
+                self.session_keys.append(session_key)
+                for exercise_id, w, r in sets:
+                    e = self._intern_exercise(exercise_id)
+                    row = len(self.weight)
+                    self.date.append(day)
+                    self.exercise.append(e)
+                    self.weight.append(w)
+                    self.reps.append(r)
+                    self.session.append(session_index)
+                    self.active.append(1)
+                    rows.append(row)
+                    new_pairs.setdefault(e, []).append((day, row))
+            insort(self._days, day)
+            self._rows_by_day[day] = rows
+            self._add_summaries(day, rows)
+            for e, pairs in new_pairs.items():
+                entries = self._by_exercise[e]
+                # Days usually arrive in order; an earlier day is spliced in at its place
+                if not entries or entries[-1] < pairs[0]:
+                    entries.extend(pairs)
+                else:
+                    i = bisect_left(entries, pairs[0])
+                    entries[i:i] = pairs
+            if self._dead > len(self.active) // 2:
+                self._compact()
+
+    def _remove_day(self, day):
+        """Deactivate a day's rows and drop them from the indexes."""
+        rows = self._rows_by_day.pop(day, None)
+        if rows is None:
+            return
+        touched = set()
+        for row in rows:
+            self.active[row] = 0
+            touched.add(self.exercise[row])
+        self._dead += len(rows)
+        for e in touched:
+            entries = self._by_exercise[e]
+            del entries[bisect_left(entries, (day, -1)):bisect_left(entries, (day + 1, -1))]
+        self._days.remove(day)
+        self._remove_summaries(day)
+
+    def _add_summaries(self, day, rows):
+        """Summarize a newly added day's rows and merge them into the running aggregates."""
+        summaries = {}
+        tonnage = 0.0
+        for row in rows:
+            e, w, r = self.exercise[row], self.weight[row], self.reps[row]
+            sets, volume, top, best = summaries.get(e, (0, 0.0, 0.0, 0.0))
+            summaries[e] = (sets + 1, volume + w * r, max(top, w), max(best, estimated_1rm(w, r)))
+            tonnage += w * r
+        self.daily_tonnage[day] = tonnage
+        self._day_summaries[day] = summaries
+        for e, (_, _, top, best) in summaries.items():
+            insort(self._exercise_days[e], day)
+            if top > self.exercise_max.get(e, -1.0):
+                self.exercise_max[e] = top
+            if best > self.exercise_best_e1rm.get(e, -1.0):
+                self.exercise_best_e1rm[e] = best
+
+    def _remove_summaries(self, day):
+        """Take a replaced day out of the aggregates; an exercise's bests are only
+        recomputed (from its per-day summaries) when this day held one of them."""
+        self.daily_tonnage.pop(day, None)
+        for e, (_, _, top, best) in self._day_summaries.pop(day).items():
+            days = self._exercise_days[e]
+            del days[bisect_left(days, day)]
+            if top < self.exercise_max[e] and best < self.exercise_best_e1rm[e]:
+                continue
+            if not days:
+                del self.exercise_max[e], self.exercise_best_e1rm[e]
+                continue
+            remaining = [self._day_summaries[d][e] for d in days]
+            self.exercise_max[e] = max(summary[2] for summary in remaining)
+            self.exercise_best_e1rm[e] = max(summary[3] for summary in remaining)
+
+    def _compact(self):
+        """Rewrite the columns without deactivated rows, so re-fetched days don't grow the store."""
+        columns = (self.date, self.exercise, self.weight, self.reps)
+        date_col, exercise_col, weight_col, reps_col = (array(c.typecode) for c in columns)
+        session_col = array('i')
+        session_keys = []
+        new_session = {}
+        by_exercise = {e: [] for e in self._by_exercise}
+        rows_by_day = {}
+        for day in self._days:
+            rows = array('i')
+            for old in self._rows_by_day[day]:
+                row = len(date_col)
+                e = self.exercise[old]
+                session_index = new_session.get(self.session[old])
+                if session_index is None:
+                    session_index = new_session[self.session[old]] = len(session_keys)
+                    session_keys.append(self.session_keys[self.session[old]])
+                date_col.append(day)
+                exercise_col.append(e)
+                weight_col.append(self.weight[old])
+                reps_col.append(self.reps[old])
+                session_col.append(session_index)
+                rows.append(row)
+                by_exercise[e].append((day, row))
+            rows_by_day[day] = rows
+        self.date, self.exercise, self.weight, self.reps = date_col, exercise_col, weight_col, reps_col
+        self.session = session_col
+        self.session_keys = session_keys
+        self.active = bytearray(b'\x01') * len(date_col)
+        self._dead = 0
+        self._rows_by_day = rows_by_day
+        self._by_exercise = by_exercise
+
+    def exercise_index(self, exercise_id):
+        return self._exercise_index.get(exercise_id)
+
+    def day_range(self, start=None, end=None):
+        """Day ordinals with sets in [start, end] (YYYY-MM-DD, inclusive, optional)."""
+        lo = bisect_left(self._days, _ordinal(start)) if start else 0
+        hi = bisect_right(self._days, _ordinal(end)) if end else len(self._days)
+        return self._days[lo:hi]
+
+    def _rows(self, start, end, exercise_ids):
+        if exercise_ids is None:
+            result = []
+            for day in self.day_range(start, end):
+                result.extend(self._rows_by_day[day])
+            return result
+
+        lo_key = (_ordinal(start), -1) if start else None
+        hi_key = (_ordinal(end) + 1, -1) if end else None
+        pairs = []
+        for exercise_id in exercise_ids:
+            e = self._exercise_index.get(exercise_id)
+            if e is None:
+                continue
+            entries = self._by_exercise[e]
+            lo = bisect_left(entries, lo_key) if lo_key else 0
+            hi = bisect_left(entries, hi_key) if hi_key else len(entries)
+            pairs.extend(entries[lo:hi])
+        pairs.sort()
+        return [row for _, row in pairs]
+
+    def rows(self, start=None, end=None, exercise_ids=None):
+        """Row numbers in date order, optionally limited to some exercises."""
+        with self._lock:
+            return self._rows(start, end, exercise_ids)
+
+    def select(self, start=None, end=None, exercise_ids=None):
+        """rows() plus the (date, exercise, weight, reps) columns those rows index.
+
+        Read together under the lock: compaction swaps in new columns, so row
+        numbers are only meaningful against the columns they came with.
+        """
+        with self._lock:
+            return self._rows(start, end, exercise_ids), (self.date, self.exercise, self.weight, self.reps)
+
+    def _exercise_day_range(self, e, start, end):
+        days = self._exercise_days[e]
+        lo = bisect_left(days, _ordinal(start)) if start else 0
+        hi = bisect_right(days, _ordinal(end)) if end else len(days)
+        return days[lo:hi]
+
+    def summaries(self, start=None, end=None, exercise_ids=None):
+        """Per-day aggregates in date order: (day ordinal, exercise index, sets, volume, top weight, best e1rm).
+
+        One entry per exercise and day, optionally limited to some exercises.
+        """
+        with self._lock:
+            if exercise_ids is None:
+                return [
+                    (day, e, *summary)
+                    for day in self.day_range(start, end)
+                    for e, summary in self._day_summaries[day].items()
+                ]
+            result = []
+            for exercise_id in exercise_ids:
+                e = self._exercise_index.get(exercise_id)
+                if e is not None:
+                    result.extend((day, e, *self._day_summaries[day][e])
+                                  for day in self._exercise_day_range(e, start, end))
+            result.sort(key=lambda entry: (entry[0], entry[1]))
+            return result
+
+    def daily_volume(self, start=None, end=None):
+        """[(YYYY-MM-DD, tonnage)] for each day with sets in [start, end]."""
+        with self._lock:
+            return [(date.fromordinal(day).isoformat(), self.daily_tonnage[day]) for day in self.day_range(start, end)]
+
+    def best(self, exercise_id):
+        """(heaviest weight, best estimated 1RM) over every stored day, or None if never logged."""
+        with self._lock:
+            e = self._exercise_index.get(exercise_id)
+            if e is None or e not in self.exercise_max:
+                return None
+            return self.exercise_max[e], self.exercise_best_e1rm[e]
+
+    def dates_with_exercises(self, exercise_ids, start=None, end=None):
+        """Sorted YYYY-MM-DD dates on which any of the exercises was logged."""
+        with self._lock:
+            days = set()
+            for exercise_id in exercise_ids:
+                e = self._exercise_index.get(exercise_id)
+                if e is not None:
+                    days.update(self._exercise_day_range(e, start, end))
+        return [date.fromordinal(day).isoformat() for day in sorted(days)]
+
+    def stats(self):
+        return {
+            'sets': len(self.active) - self._dead,
+            'days': len(self._days),
+            'exercises': len(self.exercise_ids),
+        }
+
+
+_stores = LRUDict(MAX_USER_SESSIONS)
+_stores_lock = threading.Lock()
+
+
+def get_set_store(account):
+    """The account's set-log store, created on first use (an evicted one is rebuilt from the session cache)."""
+    with _stores_lock:
+        store = _stores.touch(account)
+        if store is None:
+            store = _stores[account] = SetLogStore()
+        return store
+
+
+def drop_set_store(account):
+    """Forget the account's set-log store, e.g. after its workout cache was cleared."""
+    with _stores_lock:
+        _stores.pop(account, None)
@@ -0,0 +1,99 @@
+"""
+Coalescing of identical in-flight upstream calls ("single flight").
+
+While a call for a key is running, other callers with the same key wait for
+it and share its result, or its exception, instead of sending their own
+request. Keys name the endpoint and its parameters, account included, so
+different users never share a call.
+"""
+
+import asyncio
+import threading
+import weakref
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        # In-flight tasks per event loop (a task can only be awaited on its own loop)
+        self._tasks = weakref.WeakKeyDictionary()
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def _join(self, calls, key, start):
+        """Return (in-flight call for key, whether it was started here), updating counters."""
+        with self._lock:
+            self.calls += 1
+            call = calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = calls[key] = start()
+            self.executed += 1
+            return call, True
+
+    def do(self, key, fn, *args):
+        """Run `fn(*args)`, or wait for the call with the same key already in flight."""
+        call, leader = self._join(self._calls, key, _Call)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn, *args):
+        """Await `fn(*args)`, or the call with the same key already in flight on this loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks = self._tasks.get(loop)
+            if tasks is None:
+                tasks = self._tasks[loop] = {}
+
+        def start():
+            task = loop.create_task(fn(*args))
+            task.add_done_callback(lambda t: self._forget(tasks, key, t))
+            return task
+
+        task, _ = self._join(tasks, key, start)
+        # A cancelled waiter mustn't cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    def _forget(self, tasks, key, task):
+        with self._lock:
+            if tasks.get(key) is task:
+                del tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter was cancelled
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'upstream': self.executed,
+            'coalesced': self.coalesced,
+        }
+
+
+# Shared by every upstream call site
+FLIGHTS = SingleFlight()
@@ -2,39 +2,59 @@
 """
 Update the exercise database cache from JEFit RSC endpoint.
 Run this manually to refresh the exercise database when needed.
-The database is also automatically created on first startup if missing.
+The database is also automatically created on first startup if missing, and
+refreshed in the background when a workout references an unknown exercise.
+
+The request is conditional (ETag / If-Modified-Since) when validators were
+recorded for the configured account's history page, and only new or changed
+exercises are merged in. Pass --full to ignore the validators and
+re-download the page.
+
+JEFit's exercises go into the shared catalog file; the configured account's
+custom exercises are stored for that account only.
 """
 
-import json
-from pathlib import Path
-from workout_info import fetch_exercise_database
+import sys
+from auth import account_key
+from catalog_db import CATALOG_PATH, CatalogDB, merge_catalog, split_custom
+from custom_exercises import CUSTOM_EXERCISES
+from workout_info import fetch_exercise_changes
 
 if __name__ == "__main__":
     try:
         print("Fetching exercise database from JEFit...")
-        exercises = fetch_exercise_database()
+        db_path = CATALOG_PATH
+        validators = {} if "--full" in sys.argv else CUSTOM_EXERCISES.validators(account_key())
+        exercises, validators = fetch_exercise_changes(validators)
+        
+        if exercises is None:
+            print(f"✓ {db_path} is up to date (not modified since the last fetch)")
+            exit(0)
         
         if not exercises:
             print("❌ No exercises found. Check your auth token.")
             exit(1)
         
-        # Ensure data directory exists
-        db_path = Path('data/exercises_db.json')
-        db_path.parent.mkdir(exist_ok=True)
-        
-        # Save to JSON
-        with open(db_path, 'w') as f:
-            json.dump(exercises, f, indent=2)
+        # Merge into the compact catalog (creates the data directory if needed)
+        shared, custom = split_custom(exercises)
+        changed = merge_catalog(shared, db_path)
+        custom_changed = CUSTOM_EXERCISES.merge(account_key(), custom)
+        CUSTOM_EXERCISES.set_validators(account_key(), validators)
         
         print(f"✓ Successfully updated {db_path}")
-        print(f"✓ Total exercises: {len(exercises)}")
+        print(f"✓ New or changed exercises: {changed} (+{custom_changed} custom)")
+        
+        catalog = CatalogDB(db_path)
+        exercise_ids = list(catalog)
+        catalog.close()
+        print(f"✓ Total exercises: {len(exercise_ids)}")
         
         # Show some stats
-        system_exercises = sum(1 for ex_id in exercises.keys() if ex_id.startswith('d_'))
-        custom_exercises = sum(1 for ex_id in exercises.keys() if ex_id.startswith('u_'))
+        system_exercises = sum(1 for ex_id in exercise_ids if ex_id.startswith('d_'))
+        custom_exercises = len(CUSTOM_EXERCISES.get(account_key()))
         
         print(f"  - System exercises: {system_exercises}")
-        print(f"  - Custom exercises: {custom_exercises}")
+        print(f"  - Custom exercises (this account): {custom_exercises}")
         
     except Exception as e:
         print(f"❌ Error updating exercise database: {e}")
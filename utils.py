@@ -1,3 +1,4 @@
+import json
 from fastmcp.tools.tool import ToolResult
 from mcp.types import TextContent
 
@@ -8,3 +9,11 @@ def text_response(text: str) -> ToolResult:
         content=[TextContent(type="text", text=text)],
         structured_content=None  # Explicitly disable structured content
     )
+
+
+def json_response(payload: dict) -> ToolResult:
+    """Return a payload as structured content, with compact JSON text for clients without structured output support."""
+    return ToolResult(
+        content=[TextContent(type="text", text=json.dumps(payload, separators=(',', ':'), ensure_ascii=False))],
+        structured_content=payload
+    )
@@ -4,107 +4,261 @@ This script fetches workout logs from the API and enriches them with
 exercise details (names, muscle groups, equipment) from the cached database.
 """
 
-import requests
-import json
+import asyncio
+import http_client
 import time
-from datetime import datetime
-import os
-from pathlib import Path
-from auth import get_access_token, get_user_id
+import sys
+from auth import current_session, auth_headers, account_key
+from session_store import STORE, RECENT_WINDOW_HOURS, day_end_timestamp
+from set_store import get_set_store
+from single_flight import FLIGHTS
+from metrics import METRICS
+from rate_limit import bulk_priority
+from history import get_workout_dates
+from catalog_db import (
+    CATALOG_PATH, LEGACY_JSON_PATH, CatalogDB, merge_catalog, migrate_json, split_custom, strip_custom_exercises,
+    write_catalog,
+)
+from custom_exercises import CUSTOM_EXERCISES
 
-def fetch_exercise_database():
-    """Fetch the full exercise database from RSC endpoint"""
-    from rsc_base import RSCParser
+def extract_history_page(shapes, validators=None):
+    """Fetch the RSC history page once and collect every requested shape in a single pass
+    
+    `validators` (the 'etag' / 'last_modified' of an earlier fetch) make the
+    request conditional. Returns (groups, validators of this response), with
+    groups None when the page hasn't changed since.
+    """
+    from rsc_base import RSCParser, RSCExtractor, STREAM_BLOCK_SIZE
     
     rsc_parser = RSCParser()
-    headers = {
-        'rsc': '1',
-        'Cookie': f'jefitAccessToken={get_access_token()}'
-    }
+    extractor = RSCExtractor(shapes)
+    validators = validators or {}
     
-    response = requests.get("https://www.jefit.com/my-jefit/progress/history", headers=headers)
-    chunks = rsc_parser.parse_rsc_response(response.text)
+    def fetch_history_page(access_token, user_id):
+        headers = {
+            'rsc': '1',
+            'Cookie': f'jefitAccessToken={access_token}'
+        }
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return http_client.get("/my-jefit/progress/history", endpoint='rsc', headers=headers, stream=True)
     
+    # Stream the (multi-megabyte) page and only decode chunks that can hold a wanted shape
+    with current_session().call(fetch_history_page) as response:
+        if response.status_code == 304:
+            return None, validators
+        response.raise_for_status()
+        chunks = rsc_parser.parse_rsc_stream(
+            response.iter_content(STREAM_BLOCK_SIZE),
+            want=extractor.chunk_predicate()
+        )
+        http_client.record_download(response, 'rsc')
+        fresh_validators = {
+            key: response.headers[header]
+            for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+            if response.headers.get(header)
+        }
+    
+    return extractor.extract(chunks), fresh_validators
+
+
+def build_exercise_db(exercise_definitions):
+    """Normalize extracted exercise definitions into the catalog format"""
     exercises_db = {}
+    for data in exercise_definitions:
+        exercises_db[data['id']] = {
+            'id': data['id'],
+            'name': data['name'],
+            'body_parts': [bp for bp in data.get('body_parts', []) if bp != 'none'],
+            'equipment': [eq for eq in data.get('equipment', []) if eq != 'none'],
+            'input_format': data.get('input_format'),
+            'popularity': data.get('popularity')
+        }
+    return exercises_db
+
+
+@METRICS.timed("fetch_exercise_database")
+def fetch_exercise_changes(validators=None):
+    """Fetch the exercise database from RSC endpoint, conditionally when `validators` are given
     
-    def extract_exercises(data, depth=0):
-        if depth > 15:
-            return
-        
-        if isinstance(data, dict):
-            # Check if this is an exercise definition
-            if 'id' in data and 'name' in data and 'body_parts' in data:
-                exercises_db[data['id']] = {
-                    'id': data['id'],
-                    'name': data['name'],
-                    'body_parts': [bp for bp in data.get('body_parts', []) if bp != 'none'],
-                    'equipment': [eq for eq in data.get('equipment', []) if eq != 'none'],
-                    'input_format': data.get('input_format'),
-                    'popularity': data.get('popularity')
-                }
-            
-            for value in data.values():
-                if isinstance(value, (dict, list)):
-                    extract_exercises(value, depth + 1)
-        
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, (dict, list)):
-                    extract_exercises(item, depth + 1)
-    
-    for chunk_data in chunks.values():
-        extract_exercises(chunk_data)
+    Returns (exercises, validators); exercises is None if the page is unchanged.
+    """
+    from rsc_base import EXERCISE_SHAPE
     
-    return exercises_db
+    key = ("history-page", account_key(), EXERCISE_SHAPE.name, tuple(sorted((validators or {}).items())))
+    groups, validators = FLIGHTS.do(key, extract_history_page, [EXERCISE_SHAPE], validators)
+    if groups is None:
+        return None, validators
+    return build_exercise_db(groups[EXERCISE_SHAPE.name]), validators
+
+
+def fetch_exercise_database():
+    """Fetch the full exercise database from RSC endpoint"""
+    return fetch_exercise_changes()[0]
+
+
+def refresh_exercise_db(db_path=CATALOG_PATH):
+    """Re-fetch the exercise database if it changed upstream and merge it in
+    
+    JEFit's exercises go into the shared catalog file and the current user's
+    custom exercises into their own account's set. The history page differs
+    per user, so the request is conditional on the validators of the page this
+    account fetched last.
+    Returns (new or changed shared exercises, new or changed custom exercises).
+    """
+    account = account_key()
+    exercises, validators = fetch_exercise_changes(CUSTOM_EXERCISES.validators(account))
+    if not exercises:
+        return 0, 0
+    shared, custom = split_custom(exercises)
+    changed = merge_catalog(shared, db_path), CUSTOM_EXERCISES.merge(account, custom)
+    CUSTOM_EXERCISES.set_validators(account, validators)
+    return changed
 
 
 def load_exercise_db():
-    """Load exercise database from JSON cache, creating it if necessary"""
-    db_path = Path('data/exercises_db.json')
+    """Open the exercise catalog, migrating the JSON cache or fetching it if necessary"""
+    db_path = CATALOG_PATH
     
     # Create data directory if it doesn't exist
     db_path.parent.mkdir(exist_ok=True)
     
+    # Migrate a legacy JSON cache into the compact catalog format
+    if not db_path.exists() and LEGACY_JSON_PATH.exists():
+        try:
+            count = migrate_json(LEGACY_JSON_PATH, db_path)
+            print(f"✓ Migrated {LEGACY_JSON_PATH} to {db_path} ({count} exercises)", file=sys.stderr)
+        except Exception as e:
+            print(f"⚠️  Failed to migrate {LEGACY_JSON_PATH}: {e}", file=sys.stderr)
+    
     # If database doesn't exist, fetch and create it
     if not db_path.exists():
-        print("Exercise database not found. Fetching from JEFit...")
+        print("Exercise database not found. Fetching from JEFit...", file=sys.stderr)
         try:
-            exercises = fetch_exercise_database()
+            exercises, validators = fetch_exercise_changes()
             
             if not exercises:
-                print("⚠️  No exercises found. Check your authentication.")
+                print("⚠️  No exercises found. Check your authentication.", file=sys.stderr)
                 return {}
             
-            # Save to JSON
-            with open(db_path, 'w') as f:
-                json.dump(exercises, f, indent=2)
+            shared, custom = split_custom(exercises)
+            write_catalog(shared, db_path)
+            CUSTOM_EXERCISES.merge(account_key(), custom)
+            CUSTOM_EXERCISES.set_validators(account_key(), validators)
             
-            print(f"✓ Created exercise database with {len(exercises)} exercises")
-            return exercises
+            print(f"✓ Created exercise database with {len(shared)} exercises "
+                  f"(+{len(custom)} custom exercises for this account)", file=sys.stderr)
             
         except Exception as e:
-            print(f"⚠️  Failed to fetch exercise database: {e}")
+            print(f"⚠️  Failed to fetch exercise database: {e}", file=sys.stderr)
             return {}
     
-    # Load existing database
+    # Catalogs from older versions also held one user's custom exercises
     try:
-        with open(db_path, 'r') as f:
-            return json.load(f)
+        removed = strip_custom_exercises(db_path)
+        if removed:
+            print(f"✓ Removed {removed} custom exercises from the shared {db_path} "
+                  f"(they are fetched again per account)", file=sys.stderr)
     except Exception as e:
-        print(f"⚠️  Error loading exercise database: {e}")
+        print(f"⚠️  Failed to remove custom exercises from {db_path}: {e}", file=sys.stderr)
+    
+    # Open the catalog read-only
+    try:
+        return CatalogDB(db_path)
+    except Exception as e:
+        print(f"⚠️  Error loading exercise database: {e}", file=sys.stderr)
         return {}
 
-def get_workout_for_date(date_str):
-    """Get workout logs for a specific date"""
+@METRICS.timed("get_workout_for_date")
+async def get_workout_for_date(date_str, refresh=False):
+    """Get workout logs for a specific date, served from the local session store when possible"""
+    account = account_key()
+    if not refresh:
+        cached = STORE.get(account, date_str)
+        if cached is not None:
+            set_store = get_set_store(account)
+            if not set_store.has_day(date_str):
+                set_store.add_day(date_str, cached)
+            METRICS.count('workout_lookups', source='cache')
+            return cached
+    
+    METRICS.count('workout_lookups', source='upstream')
+    # Concurrent requests for the same account and date share one upstream call
+    return await FLIGHTS.do_async(("sessions", account, date_str), fetch_workout_for_date, account, date_str)
+
+
+@METRICS.timed("fetch_workout_for_date")
+async def fetch_workout_for_date(account, date_str):
+    """Fetch one date's workout logs from JEFit and add them to the local caches"""
     date_unix = int(time.mktime(time.strptime(date_str, "%Y-%m-%d")))
-    # Get Access Token and User ID
-    access_token = get_access_token()
-    user_id = get_user_id(access_token)
-    url = f"https://www.jefit.com/api/v2/users/{user_id}/sessions?startDate={date_unix}"
-    headers = {
-        'content-type': 'application/json',
-        'Cookie': f'jefitAccessToken={access_token}'
-    }
-    
-    response = requests.get(url, headers=headers)
-    return response.json()
+    
+    async def fetch_sessions(access_token, user_id):
+        return await http_client.get_async(
+            f"/api/v2/users/{user_id}/sessions",
+            params={'startDate': date_unix},
+            headers=auth_headers(access_token)
+        )
+    
+    response = await current_session().call_async(fetch_sessions)
+    if response.status_code != 200:
+        raise Exception(f"Failed to get workout logs from JEFit: {response.status_code} {response.text}")
+    workout_data = response.json()
+    
+    # Only cache complete payloads so anything else is fetched again next time
+    if 'data' in workout_data:
+        STORE.put(account, date_str, workout_data)
+        get_set_store(account).add_day(date_str, workout_data)
+    
+    return workout_data
+
+
+async def get_workouts_for_dates(dates, refresh=False):
+    """Fetch each date's workout concurrently, isolating per-date failures.
+    
+    Requests in flight are capped by the account's concurrency limit, and
+    more than one date is sent as bulk traffic so single-date calls from
+    other clients go first. `refresh` skips the session store.
+    Returns a dict of date -> payload, or the exception raised for that date.
+    """
+    if not dates:
+        return {}
+    
+    async def fetch(date_str):
+        try:
+            return await get_workout_for_date(date_str, refresh)
+        except Exception as e:
+            return e
+    
+    if len(dates) == 1:
+        return {dates[0]: await fetch(dates[0])}
+    with bulk_priority():
+        return dict(zip(dates, await asyncio.gather(*(fetch(date_str) for date_str in dates))))
+
+
+async def get_workouts_between(start_date, end_date):
+    """Get workout payloads for every workout date in [start_date, end_date]
+    
+    The sessions endpoint only filters by a single startDate, so the synced
+    calendar index decides which days actually have logs; only those days are
+    requested, and days already in the session store need no request at all.
+    """
+    return await get_workouts_for_dates(await get_workout_dates(start_date, end_date))
+
+
+async def load_sets_between(start_date, end_date):
+    """Make sure every workout date in the range is in the account's set-log store, and return the store
+    
+    Days already in the store are only fetched again while they are recent
+    enough that the session store would revalidate them.
+    """
+    account = account_key()
+    set_store = get_set_store(account)
+    settled_before = time.time() - RECENT_WINDOW_HOURS * 3600
+    missing = [
+        date_str for date_str in await get_workout_dates(start_date, end_date)
+        if not set_store.has_day(date_str) or day_end_timestamp(date_str) > settled_before
+    ]
+    await get_workouts_for_dates(missing)
+    return set_store